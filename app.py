@@ -8,6 +8,8 @@ load_dotenv()
 from flask import Flask
 from config import PORT, DB_PATH
 from scripts.setup_db import setup_database
+from services.embedders import preload_local_model
+from services.search import get_lexical_index
 
 # Initialize database on startup (creates tables if missing)
 setup_database()
@@ -16,7 +18,7 @@ app = Flask(__name__)
 
 # Register blueprints
 from routes.telegram import bp as telegram_bp
-from routes.api import bp as api_bp
+from routes.api import bp as api_bp, get_journey_payloads
 from routes.auth import bp as auth_bp
 from routes.web import bp as web_bp
 
@@ -25,6 +27,13 @@ app.register_blueprint(api_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(web_bp)
 
+# Build the BM25 index and /api/journey payloads now so gunicorn --preload workers share them
+get_lexical_index()
+get_journey_payloads()
+
+# Load the local embedding model (EMBED_BACKEND local/auto) before fork, not inside a webhook
+preload_local_model()
+
 if __name__ == '__main__':
     debug_mode = os.environ.get('FLASK_DEBUG', 'False').lower() == 'true'
     app.run(host='0.0.0.0', port=PORT, debug=debug_mode)
@@ -14,16 +14,67 @@ MSG91_AUTH_KEY = os.environ.get('MSG91_AUTH_KEY')
 MSG91_TEMPLATE_ID = os.environ.get('MSG91_TEMPLATE_ID')
 PORT = int(os.environ.get('PORT', 5000))
 
+# Telegram HTTP client (keep-alive pool shared by all calls in a worker)
+TELEGRAM_POOL_SIZE = int(os.environ.get('TELEGRAM_POOL_SIZE', 20))
+TELEGRAM_RETRIES = int(os.environ.get('TELEGRAM_RETRIES', 2))
+
+# Daily push fan-out (Telegram allows ~30 broadcast messages/sec per bot)
+PUSH_WORKERS = int(os.environ.get('PUSH_WORKERS', 8))
+PUSH_RATE = float(os.environ.get('PUSH_RATE', 25))
+PUSH_MAX_ATTEMPTS = 3
+# Journey advances are committed every PUSH_COMMIT_BATCH deliveries or PUSH_COMMIT_INTERVAL
+# seconds, whichever comes first, so a killed worker loses little progress
+PUSH_COMMIT_BATCH = 50
+PUSH_COMMIT_INTERVAL = 2.0
+# Run /daily-push in a background thread and answer 202 at once (0 = inline)
+PUSH_BACKGROUND = os.environ.get('PUSH_BACKGROUND', '1') == '1'
+# A running push (push_runs row) that has not sent a heartbeat for this many seconds
+# is taken to be dead (worker killed), so a new /daily-push may start
+PUSH_RUN_STALE_AFTER = float(os.environ.get('PUSH_RUN_STALE_AFTER', 300))
+
+# Background Gemini upgrades of sent replies (0 workers = run inline)
+FOLLOWUP_WORKERS = int(os.environ.get('FOLLOWUP_WORKERS', 4))
+FOLLOWUP_MAX_PENDING = int(os.environ.get('FOLLOWUP_MAX_PENDING', 100))
+# Stream Gemini output into the message section by section; edits at most this often
+GEMINI_STREAMING = os.environ.get('GEMINI_STREAMING', '1') == '1'
+STREAM_EDIT_INTERVAL = float(os.environ.get('STREAM_EDIT_INTERVAL', 1.0))
+
 # Paths
 BASE_DIR = Path(__file__).parent
 DATA_DIR = BASE_DIR / 'data'
 DB_PATH = BASE_DIR / 'gitagpt.db'
+CACHE_DB_PATH = Path(os.environ.get('CACHE_DB_PATH', BASE_DIR / 'cache.db'))
 CHROMADB_PATH = DATA_DIR / 'chromadb_mvp'
+# Compact quantised vector stores (<collection>.vec), exported by scripts/index_embeddings.py
+VECTOR_STORE_DIR = DATA_DIR / 'vectors'
 
 # Rate limiting
 RATE_LIMIT = 20
 RATE_WINDOW = 3600  # 1 hour in seconds
 
+# Query embedding cache (in-process LRU entries per worker, rows kept in CACHE_DB_PATH)
+EMBED_CACHE_SIZE = int(os.environ.get('EMBED_CACHE_SIZE', 2048))
+EMBED_CACHE_MAX_ENTRIES = int(os.environ.get('EMBED_CACHE_MAX_ENTRIES', 20000))
+
+# Query embedder: 'cohere', 'local' (in-process CPU model) or 'auto' (Cohere, local as fallback)
+EMBED_BACKEND = os.environ.get('EMBED_BACKEND', 'auto')
+LOCAL_EMBED_MODEL = os.environ.get('LOCAL_EMBED_MODEL', 'sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2')
+LOCAL_EMBED_THREADS = int(os.environ.get('LOCAL_EMBED_THREADS', 1))
+# Cosine distance above which the local model's matches are dropped. Distances are not
+# comparable across models, so this is tuned apart from Cohere's 0.50
+LOCAL_EMBED_MAX_DISTANCE = float(os.environ.get('LOCAL_EMBED_MAX_DISTANCE', 0.60))
+
+# Gemini circuit breaker: consecutive errors before a model is skipped,
+# and its cool-down when a 429 carries no retry delay
+GEMINI_FAILURE_THRESHOLD = 3
+GEMINI_COOLDOWN = float(os.environ.get('GEMINI_COOLDOWN', 60))
+
+# Gemini contextual interpretation cache (shared SQLite table in CACHE_DB_PATH)
+INTERP_CACHE_TTL_DAYS = float(os.environ.get('INTERP_CACHE_TTL_DAYS', 30))
+INTERP_CACHE_MAX_ENTRIES = int(os.environ.get('INTERP_CACHE_MAX_ENTRIES', 20000))
+# Reuse an answer for a near-identical question (query embedding cosine); 0 disables
+INTERP_CACHE_SIMILARITY = float(os.environ.get('INTERP_CACHE_SIMILARITY', 0.97))
+
 # Guardrails - blocked words (Hindi + Hinglish + English)
 BLOCKED_WORDS = [
     'भड़वा', 'रंडी', 'चूतिया', 'मादरचोद', 'बहनचोद', 'गांड', 'लौड़ा', 'भोसड़ी',
@@ -41,6 +92,9 @@ OFFTOPIC_KEYWORDS = [
     'muslim', 'hindu', 'christian', 'sex', 'porn', 'nude', 'xxx',
 ]
 
+# Extra filter entries (same three categories), hot-reloaded when the file changes
+CONTENT_FILTER_PATH = DATA_DIR / 'content_filter.json'
+
 # Telegram topic menu (5 v1 topics)
 TOPIC_MENU = {
     'chinta': 'मुझे चिंता/डर लगता है',
@@ -1,6 +1,72 @@
 """Content filtering - profanity, manipulation, off-topic."""
 
-from config import BLOCKED_WORDS, MANIPULATION_PATTERNS, OFFTOPIC_KEYWORDS
+import json
+import time
+import logging
+from config import BLOCKED_WORDS, MANIPULATION_PATTERNS, OFFTOPIC_KEYWORDS, CONTENT_FILTER_PATH
+from services.matcher import KeywordMatcher
+
+logger = logging.getLogger('gitagpt.content_filter')
+
+# Priority order: if a message hits several categories, the first one wins
+CATEGORIES = ('profanity', 'manipulation', 'offtopic')
+
+# How often (seconds) to stat the filter file for changes
+_RELOAD_INTERVAL = 30
+
+_matcher = None
+_loaded_mtime = None
+_next_check = 0.0
+
+
+def _load_lists() -> dict[str, list[str]]:
+    """Built-in lists from config, extended by CONTENT_FILTER_PATH if present.
+
+    The file must be a JSON object mapping categories to lists of strings;
+    anything else raises ValueError.
+    """
+    lists = {
+        'profanity': list(BLOCKED_WORDS),
+        'manipulation': list(MANIPULATION_PATTERNS),
+        'offtopic': list(OFFTOPIC_KEYWORDS),
+    }
+    if CONTENT_FILTER_PATH.exists():
+        with open(CONTENT_FILTER_PATH, 'r', encoding='utf-8') as f:
+            extra = json.load(f)
+        if not isinstance(extra, dict):
+            raise ValueError(f"{CONTENT_FILTER_PATH.name} must hold a JSON object, not {type(extra).__name__}")
+        for category in CATEGORIES:
+            words = extra.get(category, [])
+            if not isinstance(words, list) or not all(isinstance(w, str) for w in words):
+                raise ValueError(f"{CONTENT_FILTER_PATH.name}: '{category}' must be a list of strings")
+            lists[category].extend(words)
+    return lists
+
+
+def reload_filters(force: bool = False) -> bool:
+    """Rebuild the matcher if the filter file changed. Returns True if rebuilt."""
+    global _matcher, _loaded_mtime, _next_check
+    _next_check = time.monotonic() + _RELOAD_INTERVAL
+
+    try:
+        mtime = CONTENT_FILTER_PATH.stat().st_mtime if CONTENT_FILTER_PATH.exists() else None
+    except OSError:
+        mtime = None
+    if not force and _matcher is not None and mtime == _loaded_mtime:
+        return False
+
+    try:
+        lists = _load_lists()
+    except (OSError, ValueError) as e:
+        logger.error(f"Content filter reload failed, keeping previous lists: {e}")
+        if _matcher is not None:
+            return False
+        lists = {'profanity': BLOCKED_WORDS, 'manipulation': MANIPULATION_PATTERNS, 'offtopic': OFFTOPIC_KEYWORDS}
+
+    _matcher = KeywordMatcher((w, category) for category in CATEGORIES for w in lists[category])
+    _loaded_mtime = mtime
+    logger.info(f"Content filter loaded: {_matcher.size} entries")
+    return True
 
 
 def check_content(message: str) -> tuple[bool, str]:
@@ -8,18 +74,20 @@ def check_content(message: str) -> tuple[bool, str]:
     Check message content for abuse/manipulation.
     Returns (is_ok, reason) - reason: 'profanity' | 'manipulation' | 'offtopic' | ''
     """
-    msg_lower = message.lower()
-
-    for word in BLOCKED_WORDS:
-        if word in msg_lower:
-            return False, 'profanity'
+    if time.monotonic() >= _next_check:
+        reload_filters()
 
-    for pattern in MANIPULATION_PATTERNS:
-        if pattern in msg_lower:
-            return False, 'manipulation'
+    found = set()
+    for category in _matcher.iter_labels(message):
+        if category == CATEGORIES[0]:
+            return False, category
+        found.add(category)
 
-    for keyword in OFFTOPIC_KEYWORDS:
-        if keyword in msg_lower:
-            return False, 'offtopic'
+    for category in CATEGORIES:
+        if category in found:
+            return False, category
 
     return True, ''
+
+
+reload_filters(force=True)
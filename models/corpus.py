@@ -0,0 +1,443 @@
+"""Corpus loading: compiled SQLite artefact with lazy record decoding, or the JSON sources.
+
+scripts/build_corpus.py compiles the cleaned shlokas, chapter bounds, curated
+topics and topic index into data/corpus.db. At runtime only the shloka IDs
+are read up front; each record is decoded the first time it is used.
+
+Every verse is a single Shloka instance, shared by the curated and complete
+lists and both lookups.
+"""
+
+import os
+import sys
+import json
+import hashlib
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from collections.abc import Mapping, Sequence
+from config import DATA_DIR
+
+logger = logging.getLogger('gitagpt.corpus')
+
+CORPUS_PATH = DATA_DIR / 'corpus.db'
+# Bump when the artefact schema or build logic changes
+CORPUS_FORMAT_VERSION = 4
+
+SOURCES = {
+    'mvp': DATA_DIR / 'gita_mvp.json',
+    'complete': DATA_DIR / 'raw' / 'gita_complete.json',
+    'curated_topics': DATA_DIR / 'curated_topics.json',
+    'topic_index': DATA_DIR / 'topic_index.json',
+}
+
+
+def _read_json(path, default=None):
+    if default is not None and not path.exists():
+        return default
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# Where a grouped verse's shared meaning sits, relative to a placeholder
+_GROUP_OFFSETS = (1, 2, 3, -1, -2)
+
+
+def _is_placeholder(meaning: str) -> bool:
+    m = meaning.lower()
+    return 'did not comment' in m or 'no commentary' in m or len(meaning.strip()) < 5
+
+
+def _is_group_meaning(meaning: str) -> bool:
+    return bool(meaning) and 'comment' not in meaning.lower() and len(meaning) > 10
+
+
+def repair_placeholders(shlokas: list[dict]) -> list[str]:
+    """Fill placeholder meanings from the verse group that carries them.
+
+    Commentators explain a group of verses once, leaving placeholders on
+    the rest. Each repaired record gets the group's meaning and commentary
+    plus a 'group_of' link to the verse it came from. Returns the IDs of
+    placeholders no neighbour could fill.
+    """
+    unresolved = []
+    for i, s in enumerate(shlokas):
+        if not _is_placeholder(s.get('hindi_meaning', '')):
+            continue
+        for offset in _GROUP_OFFSETS:
+            idx = i + offset
+            if 0 <= idx < len(shlokas) and _is_group_meaning(shlokas[idx].get('hindi_meaning', '')):
+                partner = shlokas[idx]
+                s['hindi_meaning'] = partner['hindi_meaning']
+                s['hindi_commentary'] = partner.get('hindi_commentary', '')
+                s['group_of'] = partner.get('group_of') or partner['shloka_id']
+                break
+        else:
+            unresolved.append(s['shloka_id'])
+    return unresolved
+
+
+# Fields every verse carries (see scripts/fetch_gita.py), plus the build's group_of link
+FIELDS = (
+    'shloka_id', 'chapter', 'verse', 'sanskrit', 'transliteration',
+    'hindi_meaning', 'hindi_commentary', 'translation_author', 'tags', 'situations',
+    'group_of',
+)
+_FIELD_SET = frozenset(FIELDS)
+_MISSING = object()
+
+
+class Shloka(Mapping):
+    """One verse, with read-only dict-style access for the formatter and routes.
+
+    Known fields live in __slots__ instead of a per-verse dict; any other
+    keys go to a small overflow dict.
+    """
+
+    __slots__ = FIELDS + ('_extra',)
+
+    def __init__(self, data: dict):
+        for key in FIELDS:
+            if key in data:
+                setattr(self, key, data[key])
+        self.shloka_id = sys.intern(data['shloka_id'])
+        self._extra = {k: v for k, v in data.items() if k not in _FIELD_SET} or None
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            return getattr(self, key, default)
+        return self._extra.get(key, default) if self._extra else default
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __iter__(self):
+        yield from (key for key in FIELDS if hasattr(self, key))
+        yield from self._extra or ()
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Shloka({self.shloka_id})"
+
+    def to_dict(self) -> dict:
+        return dict(self.items())
+
+
+def merge_records(shlokas: list[dict], complete: list[dict]) -> dict[str, dict]:
+    """One record per verse. Curated verses keep their curated text (topic buttons,
+    /shloka and the journey all show it); the complete corpus fills their gaps."""
+    merged = {s['shloka_id']: dict(s) for s in complete}
+    for s in shlokas:
+        record = merged.setdefault(s['shloka_id'], {})
+        if s.get('hindi_meaning') and not s.get('group_of'):
+            # The curated meaning is the verse's own, not the repaired group's
+            record.pop('group_of', None)
+        for key, value in s.items():
+            if value or key not in record:
+                record[key] = value
+    return merged
+
+
+def compute_chapter_bounds(shlokas) -> dict[int, dict]:
+    """{chapter: {'first': position, 'last': position}} over the sequential corpus."""
+    bounds = {}
+    for i, s in enumerate(shlokas):
+        ch = s['chapter']
+        if ch not in bounds:
+            bounds[ch] = {'first': i, 'last': i}
+        else:
+            bounds[ch]['last'] = i
+    return bounds
+
+
+def source_fingerprint(sources: dict = SOURCES) -> dict[str, str | None]:
+    """sha1 of each JSON source (None if missing), recorded to detect stale artefacts.
+
+    Hashing the raw bytes costs a few ms, far less than parsing them.
+    """
+    return {
+        name: hashlib.sha1(path.read_bytes()).hexdigest() if path.exists() else None
+        for name, path in sources.items()
+    }
+
+
+def _parse_sources(sources: dict) -> dict:
+    mvp = _read_json(sources['mvp'])
+    complete = _read_json(sources['complete'])
+    unresolved = {'mvp': repair_placeholders(mvp), 'complete': repair_placeholders(complete)}
+    return {
+        'records': merge_records(mvp, complete),
+        'mvp_ids': [s['shloka_id'] for s in mvp],
+        'complete_ids': [s['shloka_id'] for s in complete],
+        'curated_topics': _read_json(sources['curated_topics']),
+        'topic_index': _read_json(sources['topic_index'], default={}),
+        'chapter_bounds': compute_chapter_bounds(complete),
+        'unresolved': unresolved,
+    }
+
+
+def load_sources(sources: dict = SOURCES) -> dict:
+    """Parse and repair the JSON sources (the slow path the artefact avoids)."""
+    parsed = _parse_sources(sources)
+    records = {sid: Shloka(data) for sid, data in parsed['records'].items()}
+    return {
+        'shlokas': [records[sid] for sid in parsed['mvp_ids']],
+        'complete_shlokas': [records[sid] for sid in parsed['complete_ids']],
+        'lookup': {sid: records[sid] for sid in parsed['mvp_ids']},
+        'complete_lookup': records,
+        'curated_topics': parsed['curated_topics'],
+        'topic_index': parsed['topic_index'],
+        'chapter_bounds': parsed['chapter_bounds'],
+    }
+
+
+# ============ Artefact ============
+
+def build_corpus(out_path=CORPUS_PATH, sources: dict = SOURCES) -> dict:
+    """Compile the cleaned JSON sources into a single SQLite artefact.
+
+    Writes to a per-process temp file and renames it into place, so readers
+    (and concurrent builders) never see a half-written corpus. Returns the row counts written and a validation
+    report: verses repaired from their group, and placeholders left unresolved.
+    """
+    corpus = _parse_sources(sources)
+    mvp_pos = {sid: i for i, sid in enumerate(corpus['mvp_ids'])}
+    complete_pos = {sid: i for i, sid in enumerate(corpus['complete_ids'])}
+    tmp_path = out_path.with_suffix(f'.{os.getpid()}.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript('''
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE records (
+                shloka_id TEXT PRIMARY KEY,
+                complete_pos INTEGER,
+                mvp_pos INTEGER,
+                data TEXT NOT NULL
+            ) WITHOUT ROWID;
+            CREATE INDEX idx_records_complete ON records(complete_pos, shloka_id);
+            CREATE INDEX idx_records_mvp ON records(mvp_pos, shloka_id);
+            CREATE TABLE chapter_bounds (chapter INTEGER PRIMARY KEY, first INTEGER, last INTEGER);
+            CREATE TABLE documents (name TEXT PRIMARY KEY, data TEXT NOT NULL);
+        ''')
+        conn.executemany(
+            'INSERT INTO records (shloka_id, complete_pos, mvp_pos, data) VALUES (?, ?, ?, ?)',
+            [(sid, complete_pos.get(sid), mvp_pos.get(sid), json.dumps(data, ensure_ascii=False))
+             for sid, data in corpus['records'].items()],
+        )
+        conn.executemany(
+            'INSERT INTO chapter_bounds (chapter, first, last) VALUES (?, ?, ?)',
+            [(ch, b['first'], b['last']) for ch, b in corpus['chapter_bounds'].items()],
+        )
+        conn.executemany(
+            'INSERT INTO documents (name, data) VALUES (?, ?)',
+            [(name, json.dumps(corpus[name], ensure_ascii=False)) for name in ('curated_topics', 'topic_index')],
+        )
+        conn.executemany('INSERT INTO meta (key, value) VALUES (?, ?)', [
+            ('format_version', str(CORPUS_FORMAT_VERSION)),
+            ('sources', json.dumps(source_fingerprint(sources))),
+            ('built_at', datetime.now().isoformat(timespec='seconds')),
+            ('unresolved_placeholders', json.dumps(corpus['unresolved'])),
+        ])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, out_path)
+
+    return {
+        'records': len(corpus['records']),
+        'shlokas': len(corpus['mvp_ids']),
+        'complete_shlokas': len(corpus['complete_ids']),
+        'chapters': len(corpus['chapter_bounds']),
+        'grouped': sum(1 for data in corpus['records'].values() if data.get('group_of')),
+        'unresolved': corpus['unresolved'],
+    }
+
+
+class _CorpusReader:
+    """Read-only connection to the artefact, shared by threads and reopened after fork."""
+
+    def __init__(self, path):
+        self.path = path
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def query(self, sql: str, params=()) -> list:
+        with self._lock:
+            if self._conn is None or self._pid != os.getpid():
+                self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+                self._pid = os.getpid()
+            return self._conn.execute(sql, params).fetchall()
+
+
+class _RecordStore:
+    """Decodes each verse from the artefact once; every view shares that instance."""
+
+    def __init__(self, reader: _CorpusReader, ids):
+        self._reader = reader
+        self._records = dict.fromkeys(ids)
+        self._lock = threading.Lock()
+
+    def _keep(self, shloka_id: str, data: str) -> Shloka:
+        record = Shloka(json.loads(data))
+        with self._lock:
+            # Another thread may have decoded it first; theirs stays canonical
+            current = self._records[shloka_id]
+            if current is None:
+                self._records[shloka_id] = current = record
+        return current
+
+    def get(self, shloka_id: str) -> Shloka:
+        record = self._records[shloka_id]
+        if record is None:
+            (data,), = self._reader.query('SELECT data FROM records WHERE shloka_id = ?', (shloka_id,))
+            record = self._keep(shloka_id, data)
+        return record
+
+    def load_all(self):
+        if None in self._records.values():
+            for shloka_id, data in self._reader.query('SELECT shloka_id, data FROM records'):
+                if self._records[shloka_id] is None:
+                    self._keep(shloka_id, data)
+
+    def extract(self, fields) -> dict[str, dict]:
+        """{shloka_id: {field: value}} for a few fields, read by SQLite without decoding records."""
+        unknown = set(fields) - _FIELD_SET
+        if unknown:
+            raise ValueError(f"Unknown shloka fields: {sorted(unknown)}")
+        pairs = ', '.join(f"'{field}', json_extract(data, '$.{field}')" for field in fields)
+        return {sid: json.loads(obj) for sid, obj in self._reader.query(f'SELECT shloka_id, json_object({pairs}) FROM records')}
+
+
+class LazyShlokas(Sequence):
+    """Shlokas in corpus order, decoded from the artefact on first access."""
+
+    def __init__(self, store: _RecordStore, ids: list[str]):
+        self._store = store
+        self.ids = ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._store.get(sid) for sid in self.ids[index]]
+        return self._store.get(self.ids[index])
+
+    def __iter__(self):
+        # Full scans (scripts) decode everything in one query
+        self._store.load_all()
+        return map(self._store.get, self.ids)
+
+    def fields(self, names) -> list[tuple[str, dict]]:
+        """(shloka_id, {name: value}) in corpus order; records stay undecoded."""
+        values = self._store.extract(names)
+        return [(sid, values[sid]) for sid in self.ids]
+
+
+class LazyLookup(Mapping):
+    """shloka_id -> Shloka view over the record store; membership never decodes."""
+
+    def __init__(self, store: _RecordStore, ids):
+        self._store = store
+        self._ids = dict.fromkeys(ids)
+
+    def __getitem__(self, shloka_id):
+        if shloka_id not in self._ids:
+            raise KeyError(shloka_id)
+        return self._store.get(shloka_id)
+
+    def __contains__(self, shloka_id) -> bool:
+        return shloka_id in self._ids
+
+    def __iter__(self):
+        return iter(self._ids)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+def shloka_fields(shlokas, names) -> list[tuple[str, dict]]:
+    """(shloka_id, {name: value}) for each shloka: index builds use this instead
+    of iterating, so the artefact's records are not all decoded at startup."""
+    if isinstance(shlokas, LazyShlokas):
+        return shlokas.fields(names)
+    return [(s['shloka_id'], {name: s.get(name) for name in names}) for s in shlokas]
+
+
+def open_corpus(path=CORPUS_PATH, sources: dict = SOURCES) -> dict | None:
+    """Open a compiled artefact, or None if it is missing, outdated or stale."""
+    if not path.exists():
+        return None
+    try:
+        reader = _CorpusReader(path)
+        meta = dict(reader.query('SELECT key, value FROM meta'))
+        if int(meta.get('format_version', 0)) != CORPUS_FORMAT_VERSION:
+            logger.warning(f"Corpus artefact {path} has format {meta.get('format_version')}, rebuild needed")
+            return None
+
+        # Sources that exist must match what the artefact was built from
+        built_from = json.loads(meta['sources'])
+        stale = [name for name, digest in source_fingerprint(sources).items()
+                 if digest is not None and built_from.get(name) != digest]
+        if stale:
+            logger.warning(f"Corpus artefact is stale ({', '.join(stale)} changed), using JSON sources")
+            return None
+
+        all_ids = [sid for (sid,) in reader.query('SELECT shloka_id FROM records')]
+        complete_ids = [sid for (sid,) in reader.query(
+            'SELECT shloka_id FROM records WHERE complete_pos IS NOT NULL ORDER BY complete_pos')]
+        mvp_ids = [sid for (sid,) in reader.query(
+            'SELECT shloka_id FROM records WHERE mvp_pos IS NOT NULL ORDER BY mvp_pos')]
+        store = _RecordStore(reader, all_ids)
+        documents = dict(reader.query('SELECT name, data FROM documents'))
+        return {
+            'shlokas': LazyShlokas(store, mvp_ids),
+            'complete_shlokas': LazyShlokas(store, complete_ids),
+            'lookup': LazyLookup(store, mvp_ids),
+            'complete_lookup': LazyLookup(store, all_ids),
+            'curated_topics': json.loads(documents['curated_topics']),
+            'topic_index': json.loads(documents['topic_index']),
+            'chapter_bounds': {
+                ch: {'first': first, 'last': last}
+                for ch, first, last in reader.query('SELECT chapter, first, last FROM chapter_bounds')
+            },
+        }
+    except (sqlite3.Error, KeyError, ValueError) as e:
+        logger.error(f"Corpus artefact unreadable ({e}), using JSON sources")
+        return None
+
+
+def load_corpus(path=CORPUS_PATH, sources: dict = SOURCES) -> dict:
+    """Corpus from the artefact when usable, otherwise from the JSON sources.
+
+    A missing or stale artefact is rebuilt here first. Under gunicorn
+    --preload that happens once in the master, so deploys need no build step.
+    """
+    if os.environ.get('CORPUS_FROM_JSON') != '1':
+        corpus = open_corpus(path, sources)
+        if corpus is None:
+            try:
+                build_corpus(path, sources)
+                logger.info(f"Built corpus artefact {path.name}")
+            except (OSError, sqlite3.Error, ValueError, KeyError) as e:
+                logger.warning(f"Could not build corpus artefact ({e})")
+            else:
+                corpus = open_corpus(path, sources)
+        if corpus is not None:
+            logger.info(f"Corpus loaded from {path.name}")
+            return corpus
+    logger.info("No usable corpus artefact, parsing JSON sources (run scripts/build_corpus.py)")
+    return load_sources(sources)
@@ -1,64 +1,27 @@
-"""Shloka data model and lookup."""
+"""Shloka data model and lookup.
+
+Records come from the compiled corpus artefact (data/corpus.db, built by
+scripts/build_corpus.py, or at startup when missing or stale) and are
+decoded on first use. If it cannot be built the JSON sources are parsed.
+"""
 
-import json
 import random
 from datetime import date
-from config import DATA_DIR
-
-def load_shlokas():
-    with open(DATA_DIR / 'gita_mvp.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def load_complete_shlokas():
-    """Load all 701 shlokas for the Gita Journey."""
-    with open(DATA_DIR / 'raw' / 'gita_complete.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def load_curated_topics():
-    with open(DATA_DIR / 'curated_topics.json', 'r', encoding='utf-8') as f:
-        return json.load(f)
-
-def load_topic_index():
-    path = DATA_DIR / 'topic_index.json'
-    if path.exists():
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-def _clean_shlokas(shlokas):
-    """Safety net: replace placeholders and handle grouped verses."""
-    for i, s in enumerate(shlokas):
-        m = s.get('hindi_meaning', '')
-        c = s.get('hindi_commentary', '')
-
-        # Detect any placeholder text
-        is_placeholder = (
-            'did not comment' in m.lower() or
-            'no commentary' in m.lower() or
-            len(m.strip()) < 5
-        )
-
-        if is_placeholder:
-            # Look forward for the group's meaning
-            for offset in [1, 2, 3, -1, -2]:
-                idx = i + offset
-                if 0 <= idx < len(shlokas):
-                    partner = shlokas[idx]
-                    pm = partner.get('hindi_meaning', '')
-                    if pm and 'comment' not in pm.lower() and len(pm) > 10:
-                        s['hindi_meaning'] = pm
-                        s['hindi_commentary'] = partner.get('hindi_commentary', '')
-                        break
-    return shlokas
-
-SHLOKAS = _clean_shlokas(load_shlokas())
-CURATED_TOPICS = load_curated_topics()
-TOPIC_INDEX = load_topic_index()
-SHLOKA_LOOKUP = {s['shloka_id']: s for s in SHLOKAS}
+from models.corpus import Shloka, load_corpus
+
+_CORPUS = load_corpus()
+
+SHLOKAS = _CORPUS['shlokas']
+CURATED_TOPICS = _CORPUS['curated_topics']
+TOPIC_INDEX = _CORPUS['topic_index']
 
 # Complete 701 shlokas for Gita Journey (sequential)
-COMPLETE_SHLOKAS = _clean_shlokas(load_complete_shlokas())
-COMPLETE_LOOKUP = {s['shloka_id']: s for s in COMPLETE_SHLOKAS}
+COMPLETE_SHLOKAS = _CORPUS['complete_shlokas']
+
+# Both lookups hand out the same Shloka instance for a verse.
+# COMPLETE_LOOKUP covers every verse, SHLOKA_LOOKUP only the curated ones.
+SHLOKA_LOOKUP = _CORPUS['lookup']
+COMPLETE_LOOKUP = _CORPUS['complete_lookup']
 
 # Chapter names in Hindi
 CHAPTER_NAMES = {
@@ -70,17 +33,11 @@ CHAPTER_NAMES = {
     16: "दैवासुरसम्पद्विभागयोग", 17: "श्रद्धात्रयविभागयोग", 18: "मोक्षसन्यासयोग",
 }
 
-# Pre-compute chapter boundaries (position ranges)
-_CHAPTER_BOUNDS = {}
-for _i, _s in enumerate(COMPLETE_SHLOKAS):
-    _ch = _s['chapter']
-    if _ch not in _CHAPTER_BOUNDS:
-        _CHAPTER_BOUNDS[_ch] = {'first': _i, 'last': _i}
-    else:
-        _CHAPTER_BOUNDS[_ch]['last'] = _i
+# Chapter boundaries (position ranges)
+_CHAPTER_BOUNDS = _CORPUS['chapter_bounds']
 
 
-def get_shloka_by_id(shloka_id: str) -> dict | None:
+def get_shloka_by_id(shloka_id: str) -> Shloka | None:
     return SHLOKA_LOOKUP.get(shloka_id)
 
 
@@ -1,19 +1,24 @@
 """REST API routes."""
 
 import os
+import json
+import hashlib
 import logging
-from flask import Blueprint, request, jsonify
-from services.search import find_relevant_shlokas
+import threading
+from flask import Blueprint, Response, request, jsonify
+from services.search import find_relevant_shlokas, best_passage
 from services.ai_interpretation import get_ai_interpretation, get_contextual_interpretation
-from services.daily import send_daily_push
+from services.daily import start_daily_push, get_push_job
+from services.metrics import get_runtime_stats
+from services.interpretations import get_interpretation
 from guardrails.content_filter import check_content
 from guardrails.sanitizer import sanitize_input, is_valid_input
 from models.shloka import (
-    SHLOKA_LOOKUP, COMPLETE_LOOKUP, COMPLETE_SHLOKAS, CHAPTER_NAMES,
+    SHLOKA_LOOKUP, COMPLETE_LOOKUP, COMPLETE_SHLOKAS, CHAPTER_NAMES, _CHAPTER_BOUNDS,
     get_daily_shloka, get_journey_shloka, get_chapter_info, is_chapter_complete,
 )
 from services.formatter import format_daily_shloka
-from config import DAILY_PUSH_SECRET, AMRIT_SHLOKAS, TOPIC_MENU, DATA_DIR
+from config import DAILY_PUSH_SECRET, AMRIT_SHLOKAS, TOPIC_MENU
 
 logger = logging.getLogger('gitagpt.api')
 
@@ -88,6 +93,7 @@ def ask():
             'shloka_id': s['shloka_id'],
             'sanskrit': s['sanskrit'],
             'hindi_meaning': s['hindi_meaning'][:500],
+            'passage': best_passage(query, s['shloka_id']),
         } for s in shlokas],
         'interpretation': interpretation,
     })
@@ -95,14 +101,44 @@ def ask():
 
 @bp.route('/daily-push', methods=['POST'])
 def daily_push():
-    """Trigger daily push to all subscribers. Requires secret key."""
+    """Start the daily push to all subscribers. Requires secret key.
+
+    The push runs in the background (thousands of subscribers outlast the
+    request timeout): answers 202 with the job, or 409 with the run already
+    in progress. Poll /daily-push/<job_id> for its stats.
+    """
     secret = request.headers.get('X-Push-Secret') or request.args.get('secret')
 
     if not DAILY_PUSH_SECRET or secret != DAILY_PUSH_SECRET:
         return jsonify({'error': 'Unauthorized'}), 401
 
-    sent, failed = send_daily_push()
-    return jsonify({'sent': sent, 'failed': failed})
+    job, started = start_daily_push()
+    return jsonify(job), 202 if started else 409
+
+
+@bp.route('/daily-push/<job_id>', methods=['GET'])
+def daily_push_status(job_id: str):
+    """Status and stats of a daily push run, started by any worker. Requires secret key."""
+    secret = request.headers.get('X-Push-Secret') or request.args.get('secret')
+
+    if not DAILY_PUSH_SECRET or secret != DAILY_PUSH_SECRET:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    job = get_push_job(job_id)
+    if not job:
+        return jsonify({'error': f'Push job {job_id} not found'}), 404
+    return jsonify(job)
+
+
+@bp.route('/metrics', methods=['GET'])
+def metrics():
+    """In-process counters for the worker that serves the request. Requires secret key."""
+    secret = request.headers.get('X-Push-Secret') or request.args.get('secret')
+
+    if not DAILY_PUSH_SECRET or secret != DAILY_PUSH_SECRET:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    return jsonify(get_runtime_stats())
 
 
 @bp.route('/health', methods=['GET'])
@@ -128,41 +164,19 @@ def get_shloka(shloka_id: str):
 
 # --- PWA API Endpoints ---
 
-def _load_interpretations():
-    """Load pre-fetched interpretations."""
-    import json
-    path = DATA_DIR / 'interpretations.json'
-    if path.exists():
-        with open(path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    return {}
-
-
-# Cache interpretations at module level
-_INTERPRETATIONS = None
-
-
-def _get_interpretations():
-    global _INTERPRETATIONS
-    if _INTERPRETATIONS is None:
-        _INTERPRETATIONS = _load_interpretations()
-    return _INTERPRETATIONS
-
-
 @bp.route('/api/amrit', methods=['GET'])
 def amrit_shlokas():
     """Return the 10 iconic अमृत shlokas with interpretations."""
-    interpretations = _get_interpretations()
     result = []
     for shloka_id, label in AMRIT_SHLOKAS:
-        shloka = COMPLETE_LOOKUP.get(shloka_id) or SHLOKA_LOOKUP.get(shloka_id)
+        shloka = COMPLETE_LOOKUP.get(shloka_id)
         if shloka:
             result.append({
                 'shloka_id': shloka_id,
                 'label': label,
                 'sanskrit': shloka['sanskrit'],
                 'hindi_meaning': shloka['hindi_meaning'],
-                'interpretation': interpretations.get(shloka_id, ''),
+                'interpretation': get_interpretation(shloka_id),
             })
     return jsonify({'shlokas': result})
 
@@ -180,44 +194,41 @@ def topics():
     return jsonify({'topics': result})
 
 
-@bp.route('/api/journey', methods=['GET'])
-def journey():
-    """Return shloka at a given journey position with chapter info."""
-    pos = request.args.get('pos', 0, type=int)
-    pos = max(0, min(pos, len(COMPLETE_SHLOKAS) - 1))
-
-    shloka = get_journey_shloka(pos)
-    if not shloka:
-        return jsonify({'error': 'Invalid position'}), 400
+# /api/journey payloads never change for the life of the process, so every
+# position is encoded once (app.py warms them before fork) and served as bytes + ETag.
+_JOURNEY_PAYLOADS = None
+_journey_lock = threading.Lock()
 
-    interpretations = _get_interpretations()
-    ch_info = get_chapter_info(pos)
-    chapter_complete = is_chapter_complete(pos)
 
-    # Build chapter map: for each chapter, how many shlokas and completion status
+def _build_chapter_map() -> list[dict]:
+    """For each chapter: name, how many shlokas and its position range."""
     chapter_map = []
     for ch in range(1, 19):
-        from models.shloka import _CHAPTER_BOUNDS
         bounds = _CHAPTER_BOUNDS.get(ch, {})
         first = bounds.get('first', 0)
         last = bounds.get('last', 0)
-        total = last - first + 1
         chapter_map.append({
             'chapter': ch,
             'name': CHAPTER_NAMES.get(ch, ''),
-            'total': total,
+            'total': last - first + 1,
             'first_pos': first,
             'last_pos': last,
         })
+    return chapter_map
 
-    return jsonify({
+
+def _build_journey_payload(pos: int, chapter_map: list[dict]) -> dict:
+    shloka = get_journey_shloka(pos)
+    ch_info = get_chapter_info(pos)
+
+    return {
         'position': pos,
         'total_shlokas': len(COMPLETE_SHLOKAS),
         'shloka': {
             'shloka_id': shloka['shloka_id'],
             'sanskrit': shloka['sanskrit'],
             'hindi_meaning': shloka['hindi_meaning'],
-            'interpretation': interpretations.get(shloka['shloka_id'], ''),
+            'interpretation': get_interpretation(shloka['shloka_id']),
         },
         'chapter': {
             'number': ch_info['chapter'],
@@ -225,7 +236,41 @@ def journey():
             'shloka_in_chapter': pos - ch_info['first_position'] + 1,
             'chapter_total': ch_info['last_position'] - ch_info['first_position'] + 1,
         },
-        'chapter_complete': chapter_complete,
+        'chapter_complete': is_chapter_complete(pos),
         'journey_complete': pos >= len(COMPLETE_SHLOKAS) - 1,
         'chapter_map': chapter_map,
-    })
+    }
+
+
+def get_journey_payloads() -> list[tuple[bytes, str]]:
+    """Pre-encoded (body, strong ETag) for every journey position, built once."""
+    global _JOURNEY_PAYLOADS
+    if _JOURNEY_PAYLOADS is None:
+        with _journey_lock:
+            if _JOURNEY_PAYLOADS is None:
+                chapter_map = _build_chapter_map()
+                payloads = []
+                for pos in range(len(COMPLETE_SHLOKAS)):
+                    body = json.dumps(_build_journey_payload(pos, chapter_map), ensure_ascii=False).encode('utf-8')
+                    payloads.append((body, hashlib.sha1(body).hexdigest()))
+                _JOURNEY_PAYLOADS = payloads
+                logger.info(f"Encoded {len(payloads)} journey payloads")
+    return _JOURNEY_PAYLOADS
+
+
+@bp.route('/api/journey', methods=['GET'])
+def journey():
+    """Return shloka at a given journey position with chapter info."""
+    pos = request.args.get('pos', 0, type=int)
+    pos = max(0, min(pos, len(COMPLETE_SHLOKAS) - 1))
+
+    payloads = get_journey_payloads()
+    if not payloads:
+        return jsonify({'error': 'Invalid position'}), 400
+
+    body, etag = payloads[pos]
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Always revalidate: unchanged payloads cost a 304 with no body
+    response.headers['Cache-Control'] = 'public, no-cache'
+    return response.make_conditional(request)
@@ -8,10 +8,10 @@ from flask import Blueprint, request, jsonify
 
 from config import TOPIC_MENU, ADMIN_USER_ID
 from services.telegram_api import send_message, send_chat_action, answer_callback_query, get_file, download_file, make_inline_keyboard
-from services.search import find_relevant_shlokas
-from services.ai_interpretation import (
-    get_ai_interpretation, get_contextual_interpretation,
-)
+from services.search import find_relevant_shlokas, rank_shlokas, get_shlokas, best_passage
+from services.ai_interpretation import get_ai_interpretation
+from services.interpretations import get_interpretation_sections
+from services.followup import submit_upgrade
 from services.session import get_session, save_session, update_context, update_top_topics
 from services.formatter import (
     format_shloka_list, format_welcome, format_help,
@@ -35,9 +35,24 @@ bp = Blueprint('telegram', __name__)
 _recent_updates = deque(maxlen=100)
 
 
+_MORE_HINT = "\n\n👉 'और' भेजें अगला श्लोक देखने के लिए"
+
+
 def _reply(chat_id, text, reply_markup=None):
-    """Helper to send reply."""
-    send_message(chat_id, text, reply_markup)
+    """Helper to send reply. Returns Telegram's response body."""
+    return send_message(chat_id, text, reply_markup)
+
+
+def _reply_with_upgrade(chat_id, query: str, shlokas: list[dict], render):
+    """Reply now with the pre-fetched interpretation; Gemini's contextual one
+    replaces it in the same message when a background worker has it.
+
+    render(interpretation) builds the full message text.
+    """
+    prefetched = get_ai_interpretation(query, shlokas[:1])
+    result = _reply(chat_id, render(prefetched)) or {}
+    message_id = (result.get('result') or {}).get('message_id')
+    submit_upgrade(chat_id, message_id, query, shlokas, render, prefetched)
 
 
 # ============ Webhook Route ============
@@ -205,9 +220,11 @@ def _handle_more(chat_id, user_id):
         _reply(chat_id, "🙏 पहले कोई प्रश्न पूछें, फिर 'और' भेजें अगला श्लोक देखने के लिए।")
         return
 
+    # Page through the ranked list stored with the question; only search
+    # again for sessions saved without one (e.g. topic buttons)
+    ranked_ids = session.get('ranked_ids') or rank_shlokas(last_query)
     shown_ids = {s['shloka_id'] for s in last_shlokas}
-    all_results = find_relevant_shlokas(last_query, max_results=5)
-    new_results = [s for s in all_results if s['shloka_id'] not in shown_ids]
+    new_results = get_shlokas([sid for sid in ranked_ids if sid not in shown_ids][:1])
 
     if not new_results:
         _reply(chat_id, "🙏 इस विषय पर और श्लोक उपलब्ध नहीं हैं।\n\nनया प्रश्न पूछें या /topic भेजें।")
@@ -215,10 +232,11 @@ def _handle_more(chat_id, user_id):
 
     shloka = new_results[0]
     all_shown = last_shlokas + [shloka]
-    save_session(user_id, last_query, all_shown)
+    save_session(user_id, last_query, all_shown, ranked_ids=ranked_ids)
 
-    interpretation = get_ai_interpretation(last_query, [shloka])
-    _reply(chat_id, format_shloka(shloka, interpretation))
+    interpretation = get_interpretation_sections(shloka['shloka_id'])
+    passage = best_passage(last_query, shloka['shloka_id'])
+    _reply(chat_id, format_shloka(shloka, interpretation, passage))
 
 
 # ============ Callback Query Handler (Topic Buttons) ============
@@ -255,7 +273,7 @@ def _handle_callback(callback_query):
             return
         logger.info(f"Amrit shloka: {shloka_id} by {user_id}")
         send_chat_action(chat_id, 'typing')
-        interpretation = get_ai_interpretation("", [shloka])
+        interpretation = get_interpretation_sections(shloka_id)
         response = format_amrit_shloka(shloka, interpretation)
         back_button = make_inline_keyboard([[{'text': '← अमृत श्लोक', 'callback_data': 'amrit:back'}]])
         _reply(chat_id, response, back_button)
@@ -282,14 +300,12 @@ def _handle_callback(callback_query):
 
     save_session(user_id, topic_label, shlokas)
 
-    send_chat_action(chat_id, 'typing')
-    interpretation = get_contextual_interpretation(topic_label, shlokas) if shlokas else ""
-    if not interpretation:
-        interpretation = get_ai_interpretation(topic_label, shlokas[:1])
-    response = format_shloka_list(shlokas, interpretation)
-    if len(shlokas) > 1:
-        response += "\n\n👉 'और' भेजें अगला श्लोक देखने के लिए"
-    _reply(chat_id, response)
+    hint = _MORE_HINT if len(shlokas) > 1 else ""
+
+    def render(interpretation):
+        return format_shloka_list(shlokas, interpretation) + hint
+
+    _reply_with_upgrade(chat_id, topic_label, shlokas, render)
 
 
 # ============ Voice Handler ============
@@ -341,21 +357,19 @@ def _process_question(chat_id, user_id: str, query: str):
 
     send_chat_action(chat_id, 'typing')
 
-    shlokas = find_relevant_shlokas(query, max_results=3)
-    save_session(user_id, query, shlokas)
+    ranked_ids = rank_shlokas(query)
+    shlokas = get_shlokas(ranked_ids[:3])
+    save_session(user_id, query, shlokas, ranked_ids=ranked_ids)
 
     if not shlokas:
         _reply(chat_id, "क्षमा करें, इस विषय पर कोई उपयुक्त श्लोक नहीं मिला। कृपया अलग शब्दों में पूछें।")
         return
 
-    send_chat_action(chat_id, 'typing')
+    hint = _MORE_HINT if len(shlokas) > 1 else ""
+    passage = best_passage(query, shlokas[0]['shloka_id'])
 
-    # Contextual Gemini interpretation (synchronous), fallback to pre-fetched
-    interpretation = get_contextual_interpretation(query, shlokas)
-    if not interpretation:
-        interpretation = get_ai_interpretation(query, shlokas[:1])
+    def render(interpretation):
+        return format_shloka(shlokas[0], interpretation, passage) + hint
 
-    response = format_shloka(shlokas[0], interpretation)
-    if len(shlokas) > 1:
-        response += "\n\n👉 'और' भेजें अगला श्लोक देखने के लिए"
-    _reply(chat_id, response)
+    # Pre-fetched interpretation now, contextual Gemini one as an edit
+    _reply_with_upgrade(chat_id, query, shlokas, render)
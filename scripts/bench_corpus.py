@@ -0,0 +1,71 @@
+"""Benchmark models.shloka startup: compiled artefact vs JSON sources.
+
+Each run imports models.shloka in a fresh interpreter (as a gunicorn worker
+or script would) and reports import time and peak RSS. The artefact runs
+also time a journey-style access of a few records.
+
+    python scripts/bench_corpus.py [runs]
+"""
+
+import os
+import sys
+import json
+import statistics
+import subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT))
+from models.corpus import CORPUS_PATH, build_corpus
+
+_PROBE = '''
+import json, time, resource
+t = time.perf_counter()
+import models.shloka as m
+imported = time.perf_counter() - t
+t = time.perf_counter()
+for pos in (0, 100, 350, 700):
+    m.get_journey_shloka(pos)
+m.get_shloka_by_id('2.47')
+access = time.perf_counter() - t
+print(json.dumps({
+    'import_ms': imported * 1000,
+    'access_ms': access * 1000,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'lazy': type(m.COMPLETE_SHLOKAS).__name__ != 'list',
+}))
+'''
+
+
+def _run(from_json: bool) -> dict:
+    env = dict(os.environ, CORPUS_FROM_JSON='1' if from_json else '0')
+    out = subprocess.run(
+        [sys.executable, '-c', _PROBE], cwd=ROOT, env=env,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def _summary(label: str, runs: list[dict]):
+    med = lambda key: statistics.median(r[key] for r in runs)
+    print(f"{label:10s} import {med('import_ms'):7.1f} ms   access {med('access_ms'):6.2f} ms   "
+          f"peak RSS {med('rss_kb') / 1024:6.1f} MB")
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    if not CORPUS_PATH.exists():
+        build_corpus(CORPUS_PATH)
+
+    json_runs = [_run(from_json=True) for _ in range(runs)]
+    artefact_runs = [_run(from_json=False) for _ in range(runs)]
+    if not artefact_runs[0]['lazy']:
+        print("Artefact was not used (stale?). Rebuild with scripts/build_corpus.py")
+
+    print(f"models.shloka startup, median of {runs} runs")
+    _summary('json', json_runs)
+    _summary('artefact', artefact_runs)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Compile the shloka corpus into data/corpus.db for fast startup.
+
+Run after any change to gita_mvp.json, raw/gita_complete.json,
+curated_topics.json or topic_index.json. models.shloka rebuilds a missing
+or stale artefact at startup, and parses the JSON sources if that fails.
+
+Placeholder meanings ("did not comment") are repaired here from their
+verse group, and the validation report lists any left unresolved.
+
+    python scripts/build_corpus.py [--strict]   # --strict: exit 1 if any remain
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from models.corpus import CORPUS_PATH, build_corpus
+
+
+def main():
+    strict = '--strict' in sys.argv[1:]
+    started = time.perf_counter()
+    report = build_corpus(CORPUS_PATH)
+    elapsed = time.perf_counter() - started
+    size_kb = CORPUS_PATH.stat().st_size / 1024
+    print(f"Built {CORPUS_PATH} in {elapsed:.2f}s ({size_kb:.0f} KB)")
+    for name in ('records', 'shlokas', 'complete_shlokas', 'chapters'):
+        print(f"  {name}: {report[name]}")
+
+    print(f"\nValidation: {report['grouped']} verses linked to their group (group_of)")
+    unresolved = {source: ids for source, ids in report['unresolved'].items() if ids}
+    if not unresolved:
+        print("  No unresolved placeholders")
+        return
+    for source, ids in unresolved.items():
+        print(f"  {source}: {len(ids)} unresolved placeholders: {', '.join(ids)}")
+    if strict:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
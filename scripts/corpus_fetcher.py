@@ -0,0 +1,123 @@
+"""Concurrent, cached verse fetcher shared by the fetch_* scripts.
+
+Responses are cached on disk as one JSON file per chapter/verse, so a re-run
+only downloads verses that are missing or older than max_age, and a partial
+failure no longer means refetching the whole corpus.
+"""
+
+import json
+import time
+import random
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+
+CACHE_ROOT = Path(__file__).parent.parent / 'data' / 'raw' / 'cache'
+
+# Statuses worth retrying; anything else (e.g. 404) fails at once
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+def cache_path(cache_dir: Path, chapter: int, verse: int) -> Path:
+    return cache_dir / f"{chapter}_{verse}.json"
+
+
+def read_cached(cache_dir: Path, chapter: int, verse: int, max_age: float | None = None) -> dict | None:
+    """Cached response, or None when missing, unreadable or older than max_age seconds."""
+    path = cache_path(cache_dir, chapter, verse)
+    try:
+        if max_age is not None and time.time() - path.stat().st_mtime > max_age:
+            return None
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_cached(cache_dir: Path, chapter: int, verse: int, data: dict):
+    path = cache_path(cache_dir, chapter, verse)
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    tmp_path.replace(path)
+
+
+def make_session(workers: int) -> requests.Session:
+    """Keep-alive session with a connection pool as large as the worker pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def fetch_json(session: requests.Session, url: str, retries: int = 3, timeout: float = 30,
+               backoff: float = 0.5) -> dict | None:
+    """GET url as JSON, retrying transient errors with jittered exponential backoff."""
+    for attempt in range(retries + 1):
+        try:
+            resp = session.get(url, timeout=timeout)
+            if resp.status_code == 200:
+                return resp.json()
+            if resp.status_code not in RETRY_STATUSES:
+                print(f"  {url}: HTTP {resp.status_code}")
+                return None
+            error = f"HTTP {resp.status_code}"
+        except (requests.RequestException, ValueError) as e:
+            error = str(e)
+        if attempt < retries:
+            time.sleep(backoff * (2 ** attempt) * (0.5 + random.random()))
+    print(f"  {url}: giving up after {retries + 1} attempts ({error})")
+    return None
+
+
+def fetch_verses(url_for, verses: list[tuple[int, int]], cache_dir: Path, workers: int = 8,
+                 max_age: float | None = None, refresh: bool = False, retries: int = 3) -> dict:
+    """Fetch every (chapter, verse) in verses, reusing cached responses.
+
+    url_for(chapter, verse) builds the URL. Returns {(chapter, verse): data}
+    for the verses that succeeded; failures are left out and retried on the
+    next run.
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    results = {}
+    todo = []
+    for chapter, verse in verses:
+        cached = None if refresh else read_cached(cache_dir, chapter, verse, max_age)
+        if cached is not None:
+            results[(chapter, verse)] = cached
+        else:
+            todo.append((chapter, verse))
+    print(f"{len(results)} verses cached, {len(todo)} to fetch ({workers} workers)")
+    if not todo:
+        return results
+
+    session = make_session(workers)
+
+    def fetch_one(chapter: int, verse: int):
+        data = fetch_json(session, url_for(chapter, verse), retries=retries)
+        if data is not None:
+            write_cached(cache_dir, chapter, verse, data)
+        return data
+
+    started = time.monotonic()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(fetch_one, c, v): (c, v) for c, v in todo}
+        for i, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            data = future.result()
+            if data is not None:
+                results[key] = data
+            else:
+                failed += 1
+            if i % 50 == 0 or i == len(todo):
+                print(f"  [{i}/{len(todo)}] fetched, {failed} failed")
+    session.close()
+
+    print(f"Fetched {len(todo) - failed} verses in {time.monotonic() - started:.1f}s")
+    if failed:
+        print(f"{failed} verses failed; re-run to retry just those")
+    return results
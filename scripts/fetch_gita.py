@@ -4,13 +4,15 @@ Bhagavad Gita Data Fetcher
 Fetches all 700 shlokas from the vedicscriptures API and structures them for Gita Sarathi.
 """
 
+import sys
 import json
 import csv
-import time
-import urllib.request
-import urllib.error
+import argparse
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.corpus_fetcher import CACHE_ROOT, fetch_verses
+
 # Verse counts for each chapter (1-18)
 CHAPTER_VERSES = {
     1: 47, 2: 72, 3: 43, 4: 42, 5: 29, 6: 47,
@@ -20,18 +22,8 @@ CHAPTER_VERSES = {
 
 API_BASE = "https://vedicscriptures.github.io/slok"
 
-def fetch_shloka(chapter: int, verse: int) -> dict | None:
-    """Fetch a single shloka from the API."""
-    url = f"{API_BASE}/{chapter}/{verse}"
-    try:
-        with urllib.request.urlopen(url, timeout=30) as response:
-            return json.loads(response.read().decode('utf-8'))
-    except urllib.error.URLError as e:
-        print(f"  Error fetching {chapter}.{verse}: {e}")
-        return None
-    except json.JSONDecodeError as e:
-        print(f"  JSON error for {chapter}.{verse}: {e}")
-        return None
+def shloka_url(chapter: int, verse: int) -> str:
+    return f"{API_BASE}/{chapter}/{verse}"
 
 def extract_hindi_translation(data: dict) -> tuple[str, str, str]:
     """
@@ -75,31 +67,14 @@ def process_shloka(data: dict) -> dict:
         'situations': []  # To be filled manually - when to use this shloka
     }
 
-def fetch_all_shlokas() -> list[dict]:
-    """Fetch all 700 shlokas from the API."""
-    all_shlokas = []
-    total = sum(CHAPTER_VERSES.values())
-    count = 0
-
-    for chapter, num_verses in CHAPTER_VERSES.items():
-        print(f"\nChapter {chapter} ({num_verses} verses):")
-
-        for verse in range(1, num_verses + 1):
-            count += 1
-            print(f"  Fetching {chapter}.{verse} ({count}/{total})...", end=' ')
-
-            raw_data = fetch_shloka(chapter, verse)
-            if raw_data:
-                processed = process_shloka(raw_data)
-                all_shlokas.append(processed)
-                print("OK")
-            else:
-                print("FAILED")
-
-            # Be nice to the API
-            time.sleep(0.1)
-
-    return all_shlokas
+def fetch_all_shlokas(workers: int = 8, max_age: float | None = None, refresh: bool = False) -> list[dict]:
+    """Fetch all 700 shlokas from the API (cached responses are reused), in verse order."""
+    verses = [(chapter, verse)
+              for chapter, num_verses in CHAPTER_VERSES.items()
+              for verse in range(1, num_verses + 1)]
+    raw = fetch_verses(shloka_url, verses, CACHE_ROOT / 'slok', workers=workers,
+                       max_age=max_age, refresh=refresh)
+    return [process_shloka(raw[key]) for key in verses if key in raw]
 
 def save_json(data: list[dict], filepath: Path):
     """Save data as JSON."""
@@ -131,6 +106,14 @@ def save_csv(data: list[dict], filepath: Path):
 
 def main():
     """Main function to fetch and save all Gita data."""
+    parser = argparse.ArgumentParser(description="Fetch all shlokas from the vedicscriptures API")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent requests")
+    parser.add_argument('--max-age-days', type=float, default=None,
+                        help="Refetch cached responses older than this (default: never)")
+    parser.add_argument('--refresh', action='store_true', help="Ignore the response cache")
+    args = parser.parse_args()
+    max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+
     print("=" * 60)
     print("Bhagavad Gita Data Fetcher for Gita Sarathi")
     print("=" * 60)
@@ -139,7 +122,7 @@ def main():
     print("=" * 60)
 
     # Fetch all shlokas
-    shlokas = fetch_all_shlokas()
+    shlokas = fetch_all_shlokas(args.workers, max_age, args.refresh)
 
     print(f"\n{'=' * 60}")
     print(f"Fetched {len(shlokas)} shlokas successfully")
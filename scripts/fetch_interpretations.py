@@ -3,25 +3,18 @@
 
 import json
 import sys
-import time
-import requests
+import argparse
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.corpus_fetcher import CACHE_ROOT, fetch_verses
 
 DATA_DIR = Path(__file__).parent.parent / 'data'
 BASE_URL = "https://raw.githubusercontent.com/vedicscriptures/bhagavad-gita/main/slok"
 
 
-def fetch_shloka(chapter: int, verse: int) -> dict | None:
-    url = f"{BASE_URL}/bhagavadgita_chapter_{chapter}_slok_{verse}.json"
-    try:
-        resp = requests.get(url, timeout=10)
-        if resp.status_code == 200:
-            return resp.json()
-    except Exception as e:
-        print(f"  Error: {e}")
-    return None
+def shloka_url(chapter: int, verse: int) -> str:
+    return f"{BASE_URL}/bhagavadgita_chapter_{chapter}_slok_{verse}.json"
 
 
 def extract_hindi_interpretation(data: dict) -> str:
@@ -42,38 +35,35 @@ def extract_hindi_interpretation(data: dict) -> str:
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Fetch Hindi interpretations for the curated shlokas")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent requests")
+    parser.add_argument('--max-age-days', type=float, default=None,
+                        help="Refetch cached responses older than this (default: never)")
+    parser.add_argument('--refresh', action='store_true', help="Ignore the response cache")
+    args = parser.parse_args()
+    max_age = args.max_age_days * 86400 if args.max_age_days is not None else None
+
     # Load curated shlokas
     with open(DATA_DIR / 'gita_mvp.json', 'r', encoding='utf-8') as f:
         shlokas = json.load(f)
 
     print(f"Fetching interpretations for {len(shlokas)} shlokas...")
 
+    verses = [tuple(int(p) for p in s['shloka_id'].split('.')) for s in shlokas]
+    raw = fetch_verses(shloka_url, verses, CACHE_ROOT / 'github', workers=args.workers,
+                       max_age=max_age, refresh=args.refresh)
+
     interpretations = {}
     success, failed = 0, 0
-
-    for i, shloka in enumerate(shlokas):
+    for shloka, key in zip(shlokas, verses):
         sid = shloka['shloka_id']
-        parts = sid.split('.')
-        chapter, verse = int(parts[0]), int(parts[1])
-
-        print(f"  [{i+1}/{len(shlokas)}] {sid}...", end=' ', flush=True)
-
-        data = fetch_shloka(chapter, verse)
-        if data:
-            interp = extract_hindi_interpretation(data)
-            if interp:
-                interpretations[sid] = interp
-                success += 1
-                print(f"OK ({len(interp)} chars)")
-            else:
-                failed += 1
-                print("no Hindi text")
+        interp = extract_hindi_interpretation(raw[key]) if key in raw else ''
+        if interp:
+            interpretations[sid] = interp
+            success += 1
         else:
             failed += 1
-            print("FAILED")
-
-        # Be nice to GitHub
-        time.sleep(0.3)
+            print(f"  {sid}: {'no Hindi text' if key in raw else 'FAILED'}")
 
     # Save
     out_path = DATA_DIR / 'interpretations.json'
@@ -1,15 +1,32 @@
-"""Batch-generate interpretations for all 701 shlokas using Gemini."""
+"""Batch-generate interpretations for all 701 shlokas using Gemini.
 
-import json
+Runs a worker pool paced by a token bucket. Every result is appended to a
+JSONL journal as soon as it arrives, so an interrupted run resumes where it
+stopped; interpretations.json is written once, when the journal is compacted
+at the end.
+
+Usage: python scripts/generate_all_interpretations.py [--workers 8] [--rate 4] [--all]
+"""
+
+import os
 import sys
+import json
 import time
+import argparse
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 from config import DATA_DIR, GOOGLE_API_KEY
+from services.throttle import TokenBucket
 
 COMPLETE_PATH = DATA_DIR / 'raw' / 'gita_complete.json'
 INTERP_PATH = DATA_DIR / 'interpretations.json'
+JOURNAL_PATH = DATA_DIR / 'interpretations.journal.jsonl'
+
+# Whole-bucket pause when every model is rate limited, and attempts per shloka
+RATE_LIMIT_PAUSE = 20
+MAX_ATTEMPTS = 3
 
 PROMPT = """आप श्रीमद्भगवद्गीता के विद्वान हैं। केवल नीचे दिए गए एक श्लोक के लिए output दें। किसी अन्य श्लोक का उल्लेख न करें।
 
@@ -34,8 +51,8 @@ PROMPT = """आप श्रीमद्भगवद्गीता के व
 MODELS = ['gemini-2.5-flash', 'gemini-2.5-flash-lite']
 
 
-def generate(client, shloka: dict) -> str | None:
-    """Generate interpretation for a single shloka."""
+def generate(client, shloka: dict) -> tuple[str | None, bool]:
+    """Generate interpretation for a single shloka. Returns (text, rate_limited)."""
     prompt = PROMPT.format(
         sanskrit=shloka['sanskrit'],
         hindi_meaning=shloka['hindi_meaning'],
@@ -54,17 +71,65 @@ def generate(client, shloka: dict) -> str | None:
             )
             text = response.text.strip()
             if text:
-                return text
+                return text, False
         except Exception as e:
             if '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e):
-                print(f"  {model} rate limited, trying fallback...")
+                print(f"  {shloka['shloka_id']}: {model} rate limited, trying fallback...")
                 continue
-            print(f"  Error ({model}): {e}")
-            return None
+            print(f"  {shloka['shloka_id']}: error ({model}): {e}")
+            return None, False
+    return None, True
+
+
+def generate_paced(client, shloka: dict, bucket: TokenBucket) -> str | None:
+    """generate() behind the shared rate limit; all-models-429 pauses every worker."""
+    for _ in range(MAX_ATTEMPTS):
+        bucket.acquire()
+        text, rate_limited = generate(client, shloka)
+        if not rate_limited:
+            return text
+        bucket.pause(RATE_LIMIT_PAUSE)
     return None
 
 
+def read_journal(path: Path) -> dict[str, str]:
+    """Results of earlier (possibly interrupted) runs. A torn last line is ignored."""
+    done = {}
+    if not path.exists():
+        return done
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            done[entry['shloka_id']] = entry['text']
+    return done
+
+
+def compact(journal: dict[str, str], path: Path = INTERP_PATH):
+    """Merge journaled results into interpretations.json with a single atomic write."""
+    if path.exists():
+        with open(path, 'r', encoding='utf-8') as f:
+            interpretations = json.load(f)
+    else:
+        interpretations = {}
+    interpretations.update(journal)
+
+    tmp_path = path.with_suffix('.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(interpretations, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+    return interpretations
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Generate shloka interpretations with Gemini")
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent Gemini calls")
+    parser.add_argument('--rate', type=float, default=4.0, help="Requests per second across all workers")
+    parser.add_argument('--all', action='store_true', help="Regenerate every shloka, not just missing ones")
+    args = parser.parse_args()
+
     if not GOOGLE_API_KEY:
         print("ERROR: GOOGLE_API_KEY not set")
         sys.exit(1)
@@ -87,41 +152,70 @@ def main():
     existing = sum(1 for v in interpretations.values() if v.strip())
     print(f"Existing non-empty interpretations: {existing}")
 
-    # Generate missing
-    missing = [s for s in shlokas if not interpretations.get(s['shloka_id'], '').strip()]
-    print(f"Missing: {len(missing)}")
+    journal = read_journal(JOURNAL_PATH)
+    if journal:
+        print(f"Resuming: {len(journal)} results already in {JOURNAL_PATH.name}")
+
+    if args.all:
+        todo = [s for s in shlokas if s['shloka_id'] not in journal]
+    else:
+        todo = [s for s in shlokas
+                if not interpretations.get(s['shloka_id'], '').strip() and s['shloka_id'] not in journal]
+    print(f"To generate: {len(todo)} ({args.workers} workers, {args.rate}/s)")
 
+    bucket = TokenBucket(args.rate)
+    started = time.monotonic()
     generated = 0
     failed = 0
-    for i, shloka in enumerate(missing):
-        sid = shloka['shloka_id']
-        print(f"[{i+1}/{len(missing)}] Generating {sid}...", end=' ')
-
-        result = generate(client, shloka)
-        if result:
-            interpretations[sid] = result
-            generated += 1
-            print(f"OK ({len(result)} chars)")
-        else:
-            failed += 1
-            print("FAILED")
-
-        # Save periodically
-        if (i + 1) % 20 == 0:
-            with open(INTERP_PATH, 'w', encoding='utf-8') as f:
-                json.dump(interpretations, f, ensure_ascii=False, indent=2)
-            print(f"  Saved. Generated: {generated}, Failed: {failed}")
-
-        # Rate limit: ~4 requests/sec for free tier
-        time.sleep(0.3)
-
-    # Final save
-    with open(INTERP_PATH, 'w', encoding='utf-8') as f:
-        json.dump(interpretations, f, ensure_ascii=False, indent=2)
+    pool = ThreadPoolExecutor(max_workers=args.workers)
+    futures = {pool.submit(generate_paced, client, s, bucket): s['shloka_id'] for s in todo}
+    recorded = set()
+
+    with open(JOURNAL_PATH, 'a', encoding='utf-8') as out:
+        def record(future):
+            nonlocal generated, failed
+            recorded.add(future)
+            sid = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"  {sid}: {e}")
+                result = None
+
+            if result:
+                # One line per result: a crash loses at most the calls in flight
+                out.write(json.dumps({'shloka_id': sid, 'text': result}, ensure_ascii=False) + '\n')
+                out.flush()
+                journal[sid] = result
+                generated += 1
+                print(f"[{len(recorded)}/{len(todo)}] {sid} OK ({len(result)} chars)")
+            else:
+                failed += 1
+                print(f"[{len(recorded)}/{len(todo)}] {sid} FAILED")
 
+        try:
+            for future in as_completed(futures):
+                record(future)
+        except KeyboardInterrupt:
+            # Drop the queued shlokas, but keep what the calls already in flight return
+            pool.shutdown(wait=False, cancel_futures=True)
+            pending = [f for f in futures if f not in recorded and not f.cancelled()]
+            print(f"\nInterrupted: journaling {len(pending)} calls in flight (Ctrl-C again to abort)")
+            for future in as_completed(pending):
+                record(future)
+            print(f"Generated {generated} this run; the journal is kept, run again to resume.")
+            sys.exit(130)
+    pool.shutdown()
+
+    interpretations = compact(journal)
+    JOURNAL_PATH.unlink(missing_ok=True)
+
+    elapsed = time.monotonic() - started
     total_filled = sum(1 for v in interpretations.values() if v.strip())
-    print(f"\nDone! Generated: {generated}, Failed: {failed}")
-    print(f"Total interpretations: {total_filled}/701")
+    print(f"\nDone in {elapsed:.0f}s! Generated: {generated}, Failed: {failed}")
+    print(f"Total interpretations: {total_filled}/{len(shlokas)}")
+    if failed:
+        print("Run again to retry the failed shlokas.")
 
 
 if __name__ == '__main__':
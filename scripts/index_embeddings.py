@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Incrementally embed all shlokas and store them in ChromaDB.
+
+Each record keeps a hash of its embedding text (and model) in its metadata,
+so a re-run only re-embeds verses whose meaning or topics changed. New
+vectors are computed in concurrent, rate-limited batches of 96 before the
+collection is touched, so a failed embed call leaves the old index intact.
+They are then upserted in chunks of Chroma's maximum batch size (a few
+thousand on SQLite builds); records are replaced in place, so the
+collection is never empty.
+
+--backend local builds the index for the in-process CPU model
+(EMBED_BACKEND=local/auto) instead of Cohere's; each backend has its own
+collection, since query and corpus vectors must come from the same model.
+
+Commentary is also split into overlapping passages (services/passages.py),
+each embedded into a '<collection>_passages' collection with ids like
+'2.47#3'; search groups passage hits back to their verse.
+
+Verses are read through models.shloka, the repaired and merged corpus the
+app serves, so placeholder verses are embedded with their group's meaning
+and a passage id rebuilds to the same text at query time.
+
+Each collection is then exported to data/vectors/<collection>.vec, a compact
+int8 (or float16) store the app memory-maps instead of reading ChromaDB.
+The app prefers that store, so it is deleted as soon as its collection
+changes (and with --store none): a failed or skipped export falls back to
+ChromaDB instead of serving stale vectors.
+
+Usage: python scripts/index_embeddings.py [--backend cohere|local] [--workers 4] [--rate 2] [--all]
+                                          [--store int8|float16|none] [--rerank-copy] [--no-passages]
+"""
+
+import sys
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from dotenv import load_dotenv
+load_dotenv()
+
+from config import DATA_DIR, VECTOR_STORE_DIR
+from models.shloka import COMPLETE_SHLOKAS, TOPIC_INDEX
+from services.embedders import get_embedders
+from services.passages import split_passages, passage_id
+from services.throttle import TokenBucket
+from services.vector_index import export_vectors
+
+CHROMADB_DIR = DATA_DIR / 'chromadb_full'
+BATCH_SIZE = 96  # Cohere's maximum texts per embed call
+
+# Short Hindi label per topic — one keyword each, used as tags
+TOPIC_HINDI = {
+    'dharma': 'धर्म', 'karma': 'कर्म', 'bhakti': 'भक्ति', 'gyan': 'ज्ञान',
+    'atma': 'आत्मा', 'mrityu': 'मृत्यु', 'krodh': 'क्रोध', 'bhay': 'भय',
+    'shanti': 'शांति', 'dukh': 'दुख', 'sukh': 'सुख', 'moha': 'मोह',
+    'tyag': 'त्याग', 'man': 'मन', 'parivar': 'परिवार', 'shraddha': 'श्रद्धा',
+    'dhyan': 'ध्यान', 'samatva': 'समत्व', 'indriya': 'इन्द्रिय',
+    'nishkam_karma': 'निष्काम कर्म', 'sharanagati': 'शरणागति', 'prem': 'प्रेम',
+    'sahas': 'साहस', 'ahankar': 'अहंकार', 'sansar': 'संसार',
+    'swadharma': 'स्वधर्म', 'guru': 'गुरु', 'sewa': 'सेवा',
+    'nishtha': 'निष्ठा', 'paap': 'पाप', 'punya': 'पुण्य',
+    'satvik': 'सात्विक', 'rajasik': 'राजसिक', 'tamasik': 'तामसिक',
+    'yuddh': 'संघर्ष', 'kaal': 'काल', 'avatar': 'अवतार',
+}
+
+# Rare/specific topics are more discriminative than common ones
+# Topics appearing in 200+ shlokas are too generic to be useful
+COMMON_TOPICS = {'karma', 'dharma', 'yuddh', 'parivar', 'sansar'}
+
+
+def prepare_embedding_text(shloka: dict, topics: list[str]) -> str:
+    """Prepare enriched text: meaning first, then specific topic tags."""
+    meaning = shloka.get('hindi_meaning', '')[:600]
+    # Only use specific/rare topics as tags (skip overly common ones)
+    specific_topics = [t for t in topics if t not in COMMON_TOPICS][:5]
+    tags = ', '.join(TOPIC_HINDI.get(t, t) for t in specific_topics)
+    if tags:
+        return f"{meaning}\nविषय: {tags}"
+    return meaning
+
+
+def text_hash(model: str, text: str) -> str:
+    """Identity of an embedding: changes with the text or the model."""
+    return hashlib.sha1(f"{model}\x1f{text}".encode('utf-8')).hexdigest()
+
+
+def load_shlokas() -> list[dict]:
+    """Every verse as the app serves it: placeholders repaired, curated fields merged."""
+    return list(COMPLETE_SHLOKAS)
+
+
+def load_documents(model: str, shlokas: list[dict]) -> list[dict]:
+    """id, text, hash and metadata for every shloka in the complete Gita."""
+    shloka_topics = {}
+    for topic, sids in TOPIC_INDEX.items():
+        for sid in sids:
+            shloka_topics.setdefault(sid, []).append(topic)
+
+    docs = []
+    for shloka in shlokas:
+        sid = shloka['shloka_id']
+        text = prepare_embedding_text(shloka, shloka_topics.get(sid, []))
+        docs.append({
+            'id': sid,
+            'text': text,
+            'metadata': {
+                'chapter': shloka['chapter'],
+                'verse': shloka['verse'],
+                'shloka_id': sid,
+                'text_hash': text_hash(model, text),
+            },
+        })
+    print(f"Loaded {len(docs)} shlokas, {len(shloka_topics)} with topic assignments")
+    return docs
+
+
+def load_passages(model: str, shlokas: list[dict]) -> list[dict]:
+    """One document per overlapping commentary passage."""
+    docs = []
+    for shloka in shlokas:
+        sid = shloka['shloka_id']
+        for n, text in enumerate(split_passages(shloka.get('hindi_commentary', ''))):
+            docs.append({
+                'id': passage_id(sid, n),
+                'text': text,
+                'metadata': {
+                    'chapter': shloka['chapter'],
+                    'verse': shloka['verse'],
+                    'shloka_id': sid,
+                    'passage': n,
+                    'text_hash': text_hash(model, text),
+                },
+            })
+    print(f"Split commentary into {len(docs)} passages")
+    return docs
+
+
+def embed_batches(embedder, texts: list[str], workers: int, rate: float) -> list[list[float]]:
+    """Embed texts in concurrent batches of BATCH_SIZE, at most `rate` calls per second."""
+    bucket = TokenBucket(rate)
+    batches = [texts[i:i + BATCH_SIZE] for i in range(0, len(texts), BATCH_SIZE)]
+
+    def embed(batch_num: int, batch: list[str]) -> list[list[float]]:
+        for attempt in range(3):
+            bucket.acquire()
+            try:
+                vectors = embedder.embed(batch, input_type='search_document')
+                print(f"  Batch {batch_num}/{len(batches)} done")
+                return vectors
+            except Exception as e:
+                if attempt == 2:
+                    raise
+                print(f"  Batch {batch_num}/{len(batches)} failed ({e}), retrying...")
+                bucket.pause(2 ** (attempt + 1))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(embed, range(1, len(batches) + 1), batches)
+        return [vector for batch in results for vector in batch]
+
+
+def store_path(name: str) -> Path:
+    return VECTOR_STORE_DIR / f"{name}.vec"
+
+
+def export_store(collection, store: str, rerank_copy: bool):
+    """Write the collection's vectors to the compact store the app memory-maps."""
+    data = collection.get(include=['embeddings'])
+    VECTOR_STORE_DIR.mkdir(parents=True, exist_ok=True)
+    path = store_path(collection.name)
+    size = export_vectors(path, data['ids'], data['embeddings'], dtype=store, keep_float16=rerank_copy)
+    float32_size = len(data['ids']) * len(data['embeddings'][0]) * 4 if data['ids'] else 0
+    print(f"Exported {len(data['ids'])} vectors ({store}) to {path}: {size / 1024:.0f} KB "
+          f"(float32: {float32_size / 1024:.0f} KB)")
+
+
+def sync_collection(client, name: str, docs: list[dict], embedder, args):
+    """Bring a collection in line with docs, embedding only what changed, then export it."""
+    collection = client.get_or_create_collection(name=name, metadata={"hnsw:space": "cosine"})
+    print(f"\nIndexing with {embedder.name} into collection '{name}'")
+
+    stored = collection.get(include=['metadatas'])
+    stored_hashes = {sid: (meta or {}).get('text_hash') for sid, meta in zip(stored['ids'], stored['metadatas'])}
+
+    wanted = {d['id'] for d in docs}
+    changed = [d for d in docs if args.all or stored_hashes.get(d['id']) != d['metadata']['text_hash']]
+    removed = [sid for sid in stored_hashes if sid not in wanted]
+    print(f"{len(stored_hashes)} stored, {len(changed)} to embed, {len(removed)} to remove")
+
+    if not changed and not removed:
+        print("Index is up to date.")
+    else:
+        started = time.monotonic()
+        if store_path(name).exists():
+            # About to go stale: without it the app reads ChromaDB until the new export is in
+            store_path(name).unlink()
+            print(f"Removed outdated store {store_path(name)}")
+        if changed:
+            # Everything is embedded before the first write, so a failed batch leaves the old index intact
+            embeddings = embed_batches(embedder, [d['text'] for d in changed], args.workers, args.rate)
+            print(f"Generated {len(embeddings)} embeddings in {time.monotonic() - started:.1f}s")
+
+            # Passages of a full re-index outnumber Chroma's per-call limit
+            chunk = client.get_max_batch_size()
+            for start in range(0, len(changed), chunk):
+                part = changed[start:start + chunk]
+                collection.upsert(
+                    ids=[d['id'] for d in part],
+                    embeddings=embeddings[start:start + chunk],
+                    metadatas=[d['metadata'] for d in part],
+                    documents=[d['text'] for d in part],
+                )
+        if removed:
+            collection.delete(ids=removed)
+        print(f"Index now holds {collection.count()} embeddings at {CHROMADB_DIR}")
+
+    if args.store != 'none':
+        export_store(collection, args.store, args.rerank_copy)
+    elif store_path(name).exists():
+        store_path(name).unlink()
+        print(f"Removed {store_path(name)}; the app will read ChromaDB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incrementally embed shlokas into ChromaDB")
+    parser.add_argument('--backend', choices=('cohere', 'local'), default='cohere', help="Embedding model to index with")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent embed calls")
+    parser.add_argument('--rate', type=float, default=2.0, help="Embed calls per second")
+    parser.add_argument('--all', action='store_true', help="Re-embed every shloka, ignoring stored hashes")
+    parser.add_argument('--store', choices=('int8', 'float16', 'none'), default='int8',
+                        help="Compact vector store to export for the app")
+    parser.add_argument('--rerank-copy', action='store_true',
+                        help="Also store float16 vectors in an int8 store, to re-rank top candidates exactly")
+    parser.add_argument('--no-passages', action='store_true', help="Skip the commentary passage index")
+    args = parser.parse_args()
+
+    embedders = get_embedders(args.backend)
+    if not embedders:
+        print(f"Error: {args.backend} embedder unavailable (missing API key or package)")
+        sys.exit(1)
+    embedder = embedders[0]
+    if args.backend == 'local':
+        # One in-process model: parallel calls would only fight over the CPU
+        args.workers, args.rate = 1, 1000.0
+
+    import chromadb
+
+    shlokas = load_shlokas()
+    CHROMADB_DIR.mkdir(parents=True, exist_ok=True)
+    client = chromadb.PersistentClient(path=str(CHROMADB_DIR))
+
+    sync_collection(client, embedder.collection, load_documents(embedder.name, shlokas), embedder, args)
+    if not args.no_passages:
+        sync_collection(client, f"{embedder.collection}_passages", load_passages(embedder.name, shlokas),
+                        embedder, args)
+    print("\nDone! Restart the app (or let new workers boot) to load the updated vectors.")
+
+
+if __name__ == '__main__':
+    main()
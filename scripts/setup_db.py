@@ -19,11 +19,18 @@ def setup_database():
             last_query TEXT,
             context TEXT,
             top_topics TEXT,
+            ranked_ids TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
     ''')
 
+    # Migration: add ranked_ids if sessions table predates 'और' paging
+    try:
+        cursor.execute('ALTER TABLE sessions ADD COLUMN ranked_ids TEXT')
+    except sqlite3.OperationalError:
+        pass  # Column already exists
+
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS messages (
             user_id TEXT,
@@ -61,6 +68,19 @@ def setup_database():
     except sqlite3.OperationalError:
         pass  # Column already exists
 
+    # One row per /daily-push run; the 'running' row is the cross-worker run lock
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS push_runs (
+            job_id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            started_at REAL NOT NULL,
+            heartbeat_at REAL NOT NULL,
+            finished_at REAL,
+            stats TEXT,
+            error TEXT
+        )
+    ''')
+
     # === OTP Auth tables ===
     cursor.execute('''
         CREATE TABLE IF NOT EXISTS web_users (
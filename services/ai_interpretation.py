@@ -1,20 +1,19 @@
 """Shloka interpretation - pre-fetched (instant) + Gemini contextual (async follow-up)."""
 
-import json
+import re
+import hashlib
 import logging
-from config import DATA_DIR, GOOGLE_API_KEY
-from services.metrics import log_event
+from config import (
+    GOOGLE_API_KEY, CACHE_DB_PATH, GEMINI_FAILURE_THRESHOLD, GEMINI_COOLDOWN,
+    INTERP_CACHE_TTL_DAYS, INTERP_CACHE_MAX_ENTRIES, INTERP_CACHE_SIMILARITY,
+)
+from services.interpretations import INTERPRETATIONS as _INTERPRETATIONS, SECTION_MARKER, split_sections
+from services.interpretation_cache import InterpretationCache
+from services.circuit_breaker import CircuitBreaker
+from services.metrics import log_event, register_runtime_stats
 
 logger = logging.getLogger('gitagpt.interpretation')
 
-# Load pre-fetched interpretations at startup
-_INTERPRETATIONS = {}
-_interp_path = DATA_DIR / 'interpretations.json'
-if _interp_path.exists():
-    with open(_interp_path, 'r', encoding='utf-8') as f:
-        _INTERPRETATIONS = json.load(f)
-    logger.info(f"Loaded {len(_INTERPRETATIONS)} pre-fetched interpretations")
-
 
 def get_ai_interpretation(user_query: str, shlokas: list[dict]) -> str:
     """Get interpretation for the first shloka. Instant - no API call."""
@@ -30,6 +29,26 @@ def get_ai_interpretation(user_query: str, shlokas: list[dict]) -> str:
 _gemini_client = None
 _MODELS = ['gemini-2.5-flash', 'gemini-2.5-flash-lite']
 
+# Shared by every caller in this worker: a model that is out of quota is
+# skipped until its cool-down ends instead of costing a 429 per request
+_breaker = CircuitBreaker(failure_threshold=GEMINI_FAILURE_THRESHOLD, cooldown=GEMINI_COOLDOWN)
+register_runtime_stats('gemini_breaker', _breaker.snapshot)
+
+_RETRY_DELAY_PATTERNS = (
+    re.compile(r"retryDelay['\"]?\s*:\s*['\"]?(\d+(?:\.\d+)?)s"),
+    re.compile(r"retry in (\d+(?:\.\d+)?)\s*s", re.IGNORECASE),
+)
+
+
+def _retry_delay(error: Exception) -> float | None:
+    """Seconds Gemini asked us to wait in a 429, if it said."""
+    message = str(error)
+    for pattern in _RETRY_DELAY_PATTERNS:
+        match = pattern.search(message)
+        if match:
+            return float(match.group(1))
+    return None
+
 
 def _get_gemini_client():
     """Lazy-init Gemini client. Returns None if unavailable."""
@@ -49,32 +68,60 @@ def _get_gemini_client():
         return None
 
 
-def _generate(client, prompt: str, max_tokens: int) -> str | None:
-    """Call Gemini with automatic fallback on quota exhaustion."""
+def _stream(client, model: str, prompt: str, config: dict, on_sections) -> str:
+    """Collect a streamed completion, calling on_sections(parts) each time
+    another [SECTION] is complete. The last part completes with the stream."""
+    text, completed = '', 0
+    for chunk in client.models.generate_content_stream(model=model, contents=prompt, config=config):
+        text += chunk.text or ''
+        parts = text.split('[SECTION]')[:-1]
+        if len(parts) > completed:
+            completed = len(parts)
+            on_sections([p.strip() for p in parts])
+    return text
+
+
+def _generate(client, prompt: str, max_tokens: int, on_sections=None) -> str | None:
+    """Call Gemini with automatic fallback on quota exhaustion.
+
+    Models whose circuit is open are skipped; if all are, Gemini is not called.
+    With on_sections, the completion is streamed (see _stream).
+    """
+    config = {
+        'max_output_tokens': max_tokens,
+        'temperature': 0.7,
+        'thinking_config': {'thinking_budget': 0},
+        'http_options': {'timeout': 15_000},
+    }
+    attempted = False
     for model in _MODELS:
+        if not _breaker.allow(model):
+            continue
+        attempted = True
         try:
-            response = client.models.generate_content(
-                model=model,
-                contents=prompt,
-                config={
-                    'max_output_tokens': max_tokens,
-                    'temperature': 0.7,
-                    'thinking_config': {'thinking_budget': 0},
-                    'http_options': {'timeout': 15_000},
-                },
-            )
-            text = response.text.strip()
+            if on_sections is None:
+                text = client.models.generate_content(model=model, contents=prompt, config=config).text
+            else:
+                text = _stream(client, model, prompt, config, on_sections)
+            _breaker.record_success(model)
+            text = text.strip()
             if text:
                 logger.info(f"Generated via {model} (Length: {len(text)})")
                 return text
         except Exception as e:
             if '429' in str(e) or 'RESOURCE_EXHAUSTED' in str(e):
+                # Quota errors open the circuit at once, for as long as Gemini asked
+                _breaker.record_failure(model, cooldown=_retry_delay(e) or GEMINI_COOLDOWN)
                 log_event('api_error', data=f'gemini_429_{model}')
                 logger.warning(f"{model} quota exhausted, trying fallback...")
                 continue
+            _breaker.record_failure(model)
             log_event('api_error', data=f'gemini_error_{model}')
             logger.error(f"Gemini error ({model}): {e}")
             return None
+    if not attempted:
+        logger.warning("All Gemini models cooling down, skipping call")
+        return None
     log_event('api_error', data='gemini_all_exhausted')
     return None
 
@@ -118,6 +165,25 @@ _DAILY_PROMPT = """आप श्रीमद्भगवद्गीता क
 सिर्फ content लिखें, [SECTION] से अलग करें। संक्षिप्त रखें।"""
 
 
+# Cached answers are scoped to the prompt text, so editing it retires them
+_SHABDARTH_PROMPT_VERSION = hashlib.sha256(_SHABDARTH_PROMPT.encode('utf-8')).hexdigest()[:16]
+
+_contextual_cache = InterpretationCache(
+    CACHE_DB_PATH,
+    ttl_seconds=INTERP_CACHE_TTL_DAYS * 86400,
+    max_entries=INTERP_CACHE_MAX_ENTRIES,
+)
+register_runtime_stats('interpretation_cache', _contextual_cache.stats)
+
+
+def _query_embedding(user_query: str) -> list[float] | None:
+    """The query's embedding if semantic search already computed it (no API call)."""
+    if not INTERP_CACHE_SIMILARITY:
+        return None
+    from services.search import cached_query_embedding
+    return cached_query_embedding(user_query)
+
+
 def _ensure_three_sections(text: str, shloka: dict, prefetched: str) -> str:
     """Guarantee the response has exactly 3 [SECTION]-delimited parts.
 
@@ -127,15 +193,15 @@ def _ensure_three_sections(text: str, shloka: dict, prefetched: str) -> str:
     if not text:
         return prefetched or ''
 
-    parts = text.split('[SECTION]')
+    parts = split_sections(text)
 
     if len(parts) >= 3:
         # Good — Gemini followed instructions. Take first 3 parts only.
-        return '[SECTION]'.join(p.strip() for p in parts[:3])
+        return SECTION_MARKER.join(parts[:3])
 
     # Gemini returned fewer than 3 sections — try to salvage
     # If pre-fetched has 3 sections, use it (it's reliable)
-    if prefetched and len(prefetched.split('[SECTION]')) >= 3:
+    if prefetched and len(_INTERPRETATIONS.get_sections(shloka['shloka_id'])) >= 3:
         return prefetched
 
     # Last resort: the text Gemini returned is probably shabdarth only.
@@ -147,26 +213,49 @@ def _ensure_three_sections(text: str, shloka: dict, prefetched: str) -> str:
     return f"{shabdarth}[SECTION]{bhavarth}[SECTION]{guidance}"
 
 
-def get_contextual_interpretation(user_query: str, shlokas: list[dict]) -> str | None:
-    """Generate shabdarth + bhavarth + contextual guidance for user's question."""
-    client = _get_gemini_client()
-    if not client or not shlokas:
+def get_contextual_interpretation(user_query: str, shlokas: list[dict], on_sections=None) -> str | None:
+    """Generate shabdarth + bhavarth + contextual guidance for user's question.
+
+    Answers are cached per (prompt version, shloka, normalised question).
+    on_sections(parts) streams the sections as Gemini finishes each one;
+    the return value is still the complete, validated interpretation.
+    """
+    if not shlokas:
         return None
 
     s = shlokas[0]
+    query_embedding = _query_embedding(user_query)
+    cached = _contextual_cache.get(
+        _SHABDARTH_PROMPT_VERSION, s['shloka_id'], user_query,
+        query_embedding=query_embedding, min_similarity=INTERP_CACHE_SIMILARITY,
+    )
+    if cached:
+        return cached
+
+    client = _get_gemini_client()
+    if not client:
+        return None
+
     prompt = _SHABDARTH_PROMPT.format(
         sanskrit=s['sanskrit'],
         hindi_meaning=s['hindi_meaning'],
         user_query=user_query,
     )
 
-    raw = _generate(client, prompt, max_tokens=1000)
+    raw = _generate(client, prompt, max_tokens=1000, on_sections=on_sections)
     if not raw:
         return None
 
     # Get pre-fetched as fallback for missing sections
     prefetched = _INTERPRETATIONS.get(s['shloka_id'], '')
-    return _ensure_three_sections(raw, s, prefetched)
+    interpretation = _ensure_three_sections(raw, s, prefetched)
+    # Only Gemini's own (validated) answers are worth caching
+    if interpretation and interpretation != prefetched:
+        _contextual_cache.put(
+            _SHABDARTH_PROMPT_VERSION, s['shloka_id'], user_query, interpretation,
+            query_embedding=query_embedding,
+        )
+    return interpretation
 
 
 def get_daily_interpretation(shloka: dict) -> str | None:
@@ -0,0 +1,82 @@
+"""Thread-safe per-key circuit breaker for flaky upstream APIs."""
+
+import time
+import threading
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker:
+    """Track health per key (e.g. model name) and stop calling broken ones.
+
+    A key opens after `failure_threshold` consecutive failures, or at once
+    when the caller knows the cool-down (a 429 with a retry delay). Once the
+    cool-down ends, one trial call is let through (half-open): success
+    closes the key, failure opens it again for twice as long, up to
+    `max_cooldown`.
+    """
+
+    def __init__(self, failure_threshold: int = 3, cooldown: float = 60.0, max_cooldown: float = 900.0):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._keys = {}
+        self._lock = threading.Lock()
+
+    def _entry(self, key: str) -> dict:
+        return self._keys.setdefault(key, {
+            'state': CLOSED, 'failures': 0, 'open_until': 0.0, 'last_cooldown': 0.0,
+            'trial_running': False, 'opened': 0, 'rejected': 0,
+        })
+
+    def allow(self, key: str) -> bool:
+        """Whether a call to key may go ahead now. Half-open keys admit one trial at a time."""
+        with self._lock:
+            e = self._entry(key)
+            if e['state'] == CLOSED:
+                return True
+            if e['state'] == OPEN and time.monotonic() >= e['open_until']:
+                e['state'] = HALF_OPEN
+            if e['state'] == HALF_OPEN and not e['trial_running']:
+                e['trial_running'] = True
+                return True
+            e['rejected'] += 1
+            return False
+
+    def record_success(self, key: str):
+        with self._lock:
+            e = self._entry(key)
+            e.update(state=CLOSED, failures=0, trial_running=False, last_cooldown=0.0)
+
+    def record_failure(self, key: str, cooldown: float | None = None):
+        """Count a failure. cooldown (seconds), if known, opens the key straight away."""
+        with self._lock:
+            e = self._entry(key)
+            e['failures'] += 1
+            if e['state'] == HALF_OPEN:
+                # The trial failed: back off harder than last time
+                cooldown = max(cooldown or 0.0, min(self.max_cooldown, (e['last_cooldown'] or self.cooldown) * 2))
+            elif cooldown is None and e['failures'] < self.failure_threshold:
+                return
+            cooldown = min(self.max_cooldown, cooldown or self.cooldown)
+            e.update(
+                state=OPEN, trial_running=False, last_cooldown=cooldown,
+                open_until=time.monotonic() + cooldown, opened=e['opened'] + 1,
+            )
+
+    def snapshot(self) -> dict:
+        """State, failures and seconds until retry per key, for metrics."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: {
+                    'state': HALF_OPEN if e['state'] == OPEN and now >= e['open_until'] else e['state'],
+                    'failures': e['failures'],
+                    'retry_in_s': round(max(0.0, e['open_until'] - now), 1) if e['state'] == OPEN else 0.0,
+                    'opened': e['opened'],
+                    'rejected': e['rejected'],
+                }
+                for key, e in self._keys.items()
+            }
@@ -1,16 +1,22 @@
 """Daily shloka push service — गीता यात्रा (sequential journey)."""
 
 import json
+import time
+import secrets
 import sqlite3
 import logging
-from config import DB_PATH
+import threading
+from config import DB_PATH, PUSH_COMMIT_BATCH, PUSH_COMMIT_INTERVAL, PUSH_BACKGROUND, PUSH_RUN_STALE_AFTER
 from models.shloka import (
     get_journey_shloka, get_chapter_info, is_chapter_complete,
     CHAPTER_NAMES, COMPLETE_SHLOKAS,
 )
-from services.ai_interpretation import get_ai_interpretation, get_daily_interpretation
+from services.ai_interpretation import get_daily_interpretation
+from services.interpretations import get_interpretation_sections
 from services.formatter import format_journey_shloka, format_chapter_milestone, format_journey_complete
-from services.telegram_api import send_message, make_inline_keyboard
+from services.telegram_api import make_inline_keyboard
+from services.push import fan_out
+from services.metrics import log_event, register_runtime_stats
 
 logger = logging.getLogger('gitagpt.daily')
 
@@ -83,6 +89,40 @@ def advance_journey(user_id: str) -> int:
         conn.close()
 
 
+def advance_journeys(user_ids) -> dict[str, int]:
+    """Advance many users' journeys by 1 in a single transaction.
+
+    Duplicate IDs advance once. Unknown users are added the way
+    advance_journey adds them. Returns {user_id: new_position}.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        with conn:
+            conn.execute('CREATE TEMP TABLE advance_batch (user_id TEXT PRIMARY KEY)')
+            conn.executemany('INSERT INTO advance_batch (user_id) VALUES (?)', [(uid,) for uid in user_ids])
+            conn.execute(
+                '''INSERT OR IGNORE INTO subscribers (user_id, active, journey_position)
+                   SELECT user_id, 1, 0 FROM advance_batch'''
+            )
+            conn.execute(
+                '''UPDATE subscribers
+                   SET journey_position = MIN(COALESCE(journey_position, 0) + 1, ?)
+                   WHERE user_id IN (SELECT user_id FROM advance_batch)''',
+                (TOTAL_SHLOKAS - 1,),
+            )
+            rows = conn.execute(
+                '''SELECT s.user_id, s.journey_position
+                   FROM subscribers s JOIN advance_batch b ON b.user_id = s.user_id'''
+            ).fetchall()
+        return dict(rows)
+    finally:
+        conn.close()
+
+
 def get_active_subscribers() -> list[dict]:
     """Get all active subscribers with their journey position."""
     conn = sqlite3.connect(DB_PATH)
@@ -101,12 +141,12 @@ def get_active_subscribers() -> list[dict]:
         conn.close()
 
 
-def _get_interpretation(shloka: dict) -> str:
-    """Get interpretation: pre-fetched first, then live Gemini."""
+def _get_interpretation(shloka: dict) -> list[str] | str:
+    """Get interpretation: pre-fetched (already split into sections) first, then live Gemini."""
     # Try pre-fetched
-    interp = get_ai_interpretation("", [shloka])
-    if interp:
-        return interp
+    sections = get_interpretation_sections(shloka['shloka_id'])
+    if sections:
+        return sections
     # Fallback to live Gemini
     return get_daily_interpretation(shloka) or ""
 
@@ -145,30 +185,202 @@ def send_journey_shloka(user_id: str, position: int) -> tuple[str, dict | None]:
     return message, markup
 
 
-def send_daily_push() -> tuple[int, int]:
-    """Send daily journey shloka to all subscribers. Returns (sent, failed)."""
+def send_daily_push() -> dict:
+    """Send daily journey shloka to all subscribers.
+
+    Messages go out concurrently via services.push.fan_out; positions of
+    delivered users are advanced every PUSH_COMMIT_BATCH deliveries or
+    PUSH_COMMIT_INTERVAL seconds, and once more however the run ends.
+    Returns sent/failed/skipped/retried counts with elapsed time and throughput.
+    """
     subscribers = get_active_subscribers()
-    sent, failed = 0, 0
+    messages = []
+    skipped, render_failed = 0, 0
+
+    # Subscribers who joined together share a position: render each once per run
+    rendered = {}
 
     for sub in subscribers:
+        position = sub['journey_position']
+        if position >= TOTAL_SHLOKAS:
+            skipped += 1  # Journey complete, skip
+            continue
+
+        if position not in rendered:
+            try:
+                rendered[position] = send_journey_shloka(sub['user_id'], position)
+            except Exception as e:
+                logger.error(f"Failed to render position {position}: {e}")
+                rendered[position] = None
+
+        if rendered[position] is None:
+            render_failed += 1
+            continue
+        message, markup = rendered[position]
+        messages.append((sub['user_id'], message, markup))
+
+    logger.info(f"Daily push: {len(rendered)} distinct positions for {len(messages)} messages")
+
+    delivered = []
+    last_flush = time.monotonic()
+
+    def flush():
+        nonlocal last_flush
+        if delivered:
+            advance_journeys(delivered)
+            delivered.clear()
+        last_flush = time.monotonic()
+
+    def on_delivered(user_id):
+        # Advance position after successful send
+        delivered.append(user_id)
+        if len(delivered) >= PUSH_COMMIT_BATCH or time.monotonic() - last_flush >= PUSH_COMMIT_INTERVAL:
+            flush()
+
+    try:
+        stats = fan_out(messages, on_delivered=on_delivered)
+    finally:
+        flush()
+
+    stats['failed'] += render_failed
+    stats['skipped'] = skipped
+    logger.info(
+        f"Daily push: {stats['sent']} sent, {stats['failed']} failed, {stats['skipped']} skipped, "
+        f"{stats['retried']} retries in {stats['elapsed_s']}s ({stats['per_sec']}/s)"
+    )
+    return stats
+
+
+# Push runs live in the push_runs table, so every gunicorn worker sees the
+# same run lock and job status. Only the newest _MAX_JOBS rows are kept.
+_MAX_JOBS = 10
+_JOB_COLUMNS = 'job_id, status, started_at, heartbeat_at, finished_at, stats, error'
+
+
+def _job_from_row(row) -> dict:
+    job = dict(row)
+    job['stats'] = json.loads(job['stats']) if job['stats'] else None
+    return job
+
+
+def get_push_job(job_id: str) -> dict | None:
+    """Status of a push run: running/done/failed, with its stats once finished."""
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute(f'SELECT {_JOB_COLUMNS} FROM push_runs WHERE job_id = ?', (job_id,)).fetchone()
+        return _job_from_row(row) if row else None
+    finally:
+        conn.close()
+
+
+def _latest_push_job() -> dict:
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    try:
+        row = conn.execute(f'SELECT {_JOB_COLUMNS} FROM push_runs ORDER BY started_at DESC LIMIT 1').fetchone()
+        return _job_from_row(row) if row else {}
+    except sqlite3.Error:
+        return {}
+    finally:
+        conn.close()
+
+
+register_runtime_stats('daily_push', _latest_push_job)
+
+
+def _claim_push_run() -> tuple[dict, bool]:
+    """Insert a 'running' row unless another live one exists, in one write transaction.
+
+    A running row without a heartbeat for PUSH_RUN_STALE_AFTER seconds is
+    marked failed first: its worker died and must not block pushes forever.
+    """
+    conn = sqlite3.connect(DB_PATH, timeout=10, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        # IMMEDIATE takes the write lock now, so two workers cannot both see "no run"
+        conn.execute('BEGIN IMMEDIATE')
+        now = time.time()
+        conn.execute(
+            """UPDATE push_runs SET status = 'failed', error = 'stale: no heartbeat', finished_at = ?
+               WHERE status = 'running' AND heartbeat_at < ?""",
+            (now, now - PUSH_RUN_STALE_AFTER),
+        )
+        row = conn.execute(f"SELECT {_JOB_COLUMNS} FROM push_runs WHERE status = 'running'").fetchone()
+        if row:
+            conn.execute('COMMIT')
+            return _job_from_row(row), False
+        job_id = secrets.token_hex(8)
+        conn.execute(
+            "INSERT INTO push_runs (job_id, status, started_at, heartbeat_at) VALUES (?, 'running', ?, ?)",
+            (job_id, now, now),
+        )
+        conn.execute(
+            'DELETE FROM push_runs WHERE job_id NOT IN (SELECT job_id FROM push_runs ORDER BY started_at DESC LIMIT ?)',
+            (_MAX_JOBS,),
+        )
+        row = conn.execute(f'SELECT {_JOB_COLUMNS} FROM push_runs WHERE job_id = ?', (job_id,)).fetchone()
+        conn.execute('COMMIT')
+        return _job_from_row(row), True
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+
+def _update_push_run(job_id: str, **fields):
+    conn = sqlite3.connect(DB_PATH, timeout=10)
+    try:
+        assignments = ', '.join(f'{name} = ?' for name in fields)
+        conn.execute(f'UPDATE push_runs SET {assignments} WHERE job_id = ?', (*fields.values(), job_id))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def _heartbeat(job_id: str, stop: threading.Event):
+    """Refresh the run's heartbeat until it finishes; stops by itself if the worker dies."""
+    while not stop.wait(PUSH_RUN_STALE_AFTER / 5):
         try:
-            position = sub['journey_position']
-
-            if position >= TOTAL_SHLOKAS:
-                continue  # Journey complete, skip
-
-            message, markup = send_journey_shloka(sub['user_id'], position)
-            result = send_message(sub['user_id'], message, markup)
-
-            if result and result.get('ok'):
-                # Advance position after successful send
-                advance_journey(sub['user_id'])
-                sent += 1
-            else:
-                failed += 1
-        except Exception as e:
-            logger.error(f"Failed to send to {sub['user_id']}: {e}")
-            failed += 1
-
-    logger.info(f"Daily push: {sent} sent, {failed} failed")
-    return sent, failed
+            _update_push_run(job_id, heartbeat_at=time.time())
+        except sqlite3.Error as e:
+            logger.warning(f"Daily push {job_id} heartbeat failed: {e}")
+
+
+def _run_push_job(job_id: str):
+    status, stats, error = 'failed', None, None
+    stop = threading.Event()
+    beat = threading.Thread(target=_heartbeat, args=(job_id, stop), name=f'daily-push-beat-{job_id}', daemon=True)
+    beat.start()
+    try:
+        stats = send_daily_push()
+        status = 'done'
+    except Exception as e:
+        logger.error(f"Daily push {job_id} failed: {e}", exc_info=True)
+        error = str(e)
+    finally:
+        stop.set()
+        beat.join()
+        now = time.time()
+        _update_push_run(job_id, status=status, stats=json.dumps(stats) if stats else None,
+                         error=error, heartbeat_at=now, finished_at=now)
+    log_event('daily_push', data=json.dumps({'job_id': job_id, 'status': status, **(stats or {})}))
+
+
+def start_daily_push() -> tuple[dict, bool]:
+    """Start send_daily_push in a background thread, so the request returns at once.
+
+    Returns (job, started). started is False when a run is already in
+    progress in any worker; job is then that run.
+    """
+    job, started = _claim_push_run()
+    if not started:
+        return job, False
+
+    if PUSH_BACKGROUND:
+        threading.Thread(target=_run_push_job, args=(job['job_id'],), name=f"daily-push-{job['job_id']}").start()
+    else:
+        _run_push_job(job['job_id'])
+    return get_push_job(job['job_id']), True
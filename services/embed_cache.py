@@ -0,0 +1,160 @@
+"""Two-tier cache for query embeddings: in-process LRU over a shared SQLite table."""
+
+import sqlite3
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from datetime import datetime
+
+logger = logging.getLogger('gitagpt.embed_cache')
+
+# Trim the table every this many writes
+_SWEEP_EVERY = 100
+
+
+def normalize_query(text: str) -> str:
+    """Cache key form of a query: lowercased, whitespace collapsed."""
+    return ' '.join(text.lower().split())
+
+
+class EmbeddingCache:
+    """LRU in front of an on-disk table that survives restarts and is shared by workers.
+
+    The table keeps the max_entries most recently stored queries (~4 KB each).
+    """
+
+    def __init__(self, db_path, max_memory: int = 2048, max_entries: int = 20000):
+        self.db_path = db_path
+        self.max_memory = max_memory
+        self.max_entries = max_entries
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _get_conn(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        if not self._table_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS query_embeddings (
+                    model TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    embedding BLOB NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (model, query)
+                )
+            ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_query_embeddings_created ON query_embeddings(created_at)')
+            conn.commit()
+            self._table_ready = True
+        return conn
+
+    def _remember(self, key: tuple, embedding: list[float]):
+        with self._lock:
+            self._lru[key] = embedding
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_memory:
+                self._lru.popitem(last=False)
+
+    def get(self, query: str, model: str) -> list[float] | None:
+        """Return the cached embedding for query, or None on a miss."""
+        key = (model, normalize_query(query))
+        with self._lock:
+            embedding = self._lru.get(key)
+            if embedding is not None:
+                self._lru.move_to_end(key)
+                self.memory_hits += 1
+                return embedding
+
+        try:
+            conn = self._get_conn()
+            try:
+                row = conn.execute(
+                    'SELECT embedding FROM query_embeddings WHERE model = ? AND query = ?',
+                    key,
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache read error: {e}")
+            row = None
+
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        embedding = array('f', row[0]).tolist()
+        self._remember(key, embedding)
+        with self._lock:
+            self.disk_hits += 1
+        return embedding
+
+    def peek(self, query: str, model: str) -> list[float] | None:
+        """Like get, but for reuse by other caches: never counts as a hit or miss."""
+        key = (model, normalize_query(query))
+        with self._lock:
+            embedding = self._lru.get(key)
+        if embedding is not None:
+            return embedding
+        try:
+            conn = self._get_conn()
+            try:
+                row = conn.execute(
+                    'SELECT embedding FROM query_embeddings WHERE model = ? AND query = ?',
+                    key,
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return array('f', row[0]).tolist() if row else None
+
+    def put(self, query: str, model: str, embedding: list[float]):
+        """Store an embedding in both tiers."""
+        key = (model, normalize_query(query))
+        self._remember(key, list(embedding))
+        try:
+            conn = self._get_conn()
+            try:
+                conn.execute(
+                    '''INSERT OR REPLACE INTO query_embeddings (model, query, embedding, created_at)
+                       VALUES (?, ?, ?, ?)''',
+                    (*key, array('f', embedding).tobytes(), datetime.now()),
+                )
+                with self._lock:
+                    self._writes += 1
+                    sweep = self._writes % _SWEEP_EVERY == 0
+                if sweep:
+                    self._sweep(conn)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Embedding cache write error: {e}")
+
+    def _sweep(self, conn):
+        """Drop the oldest entries beyond max_entries."""
+        conn.execute(
+            '''DELETE FROM query_embeddings WHERE rowid IN (
+                   SELECT rowid FROM query_embeddings ORDER BY created_at DESC LIMIT -1 OFFSET ?
+               )''',
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+                'memory_size': len(self._lru),
+            }
@@ -0,0 +1,127 @@
+"""Text embedders behind semantic search and the offline indexer.
+
+Each embedder has a `name` (the embedding cache and index hash key), the
+ChromaDB `collection` holding corpus vectors made with the same model, so
+query and corpus vectors always come from one model, and the `max_distance`
+above which its matches are too weak to trust (distances are not
+comparable across models).
+"""
+
+import time
+import logging
+import threading
+from config import (
+    COHERE_API_KEY, EMBED_BACKEND, LOCAL_EMBED_MODEL, LOCAL_EMBED_THREADS, LOCAL_EMBED_MAX_DISTANCE,
+)
+
+logger = logging.getLogger('gitagpt.embedders')
+
+# Lazy imports for optional dependencies
+try:
+    import cohere
+    COHERE_AVAILABLE = True
+except ImportError:
+    COHERE_AVAILABLE = False
+
+try:
+    import torch
+    from sentence_transformers import SentenceTransformer
+    LOCAL_AVAILABLE = True
+except ImportError:
+    LOCAL_AVAILABLE = False
+
+COHERE_EMBED_MODEL = "embed-multilingual-v3.0"
+
+# Loaded local models by name, shared by every LocalEmbedder in the process
+_local_models = {}
+_local_models_lock = threading.Lock()
+
+
+class CohereEmbedder:
+    """Cohere's hosted multilingual model (one network round trip per call)."""
+
+    name = COHERE_EMBED_MODEL
+    collection = 'gita_full'
+    max_distance = 0.50
+
+    def __init__(self, api_key: str):
+        self.client = cohere.Client(api_key)
+
+    def embed(self, texts: list[str], input_type: str = 'search_query') -> list[list[float]]:
+        response = self.client.embed(
+            texts=texts,
+            model=self.name,
+            input_type=input_type,
+            truncate="END",
+        )
+        return response.embeddings
+
+
+class LocalEmbedder:
+    """Small multilingual sentence-transformer run on CPU inside the worker.
+
+    The model's Linear layers are quantised to int8, which makes it about
+    4x smaller and 2-3x faster than float32. Loading it (a Hub download on
+    first run, then quantisation) is too slow for a request: app.py calls
+    preload_local_model() at startup, and the first embed call otherwise.
+    """
+
+    collection = 'gita_local'
+    max_distance = LOCAL_EMBED_MAX_DISTANCE
+
+    def __init__(self, model_name: str = LOCAL_EMBED_MODEL):
+        self.model_name = model_name
+        self.name = f"local:{model_name}"
+
+    def _get_model(self):
+        with _local_models_lock:
+            if self.model_name not in _local_models:
+                torch.set_num_threads(LOCAL_EMBED_THREADS)
+                started = time.monotonic()
+                model = SentenceTransformer(self.model_name, device='cpu')
+                _local_models[self.model_name] = torch.quantization.quantize_dynamic(
+                    model, {torch.nn.Linear}, dtype=torch.qint8,
+                )
+                logger.info(f"Local embedder loaded: {self.model_name} (int8) in {time.monotonic() - started:.1f}s")
+            return _local_models[self.model_name]
+
+    def embed(self, texts: list[str], input_type: str = 'search_query') -> list[list[float]]:
+        # Symmetric model: queries and documents are encoded the same way
+        model = self._get_model()
+        with torch.inference_mode():
+            vectors = model.encode(texts, batch_size=32, normalize_embeddings=True, convert_to_numpy=True)
+        return vectors.tolist()
+
+
+def get_embedders(backend: str = EMBED_BACKEND) -> list:
+    """Usable embedders for a backend setting, in order of preference."""
+    embedders = []
+    if backend in ('cohere', 'auto'):
+        if not COHERE_AVAILABLE:
+            logger.warning("cohere not installed.")
+        elif not COHERE_API_KEY:
+            logger.warning("COHERE_API_KEY not set.")
+        else:
+            embedders.append(CohereEmbedder(COHERE_API_KEY))
+    if backend in ('local', 'auto'):
+        if LOCAL_AVAILABLE:
+            embedders.append(LocalEmbedder())
+        elif backend == 'local':
+            logger.warning("sentence-transformers/torch not installed; local embedder unavailable.")
+    return embedders
+
+
+def preload_local_model() -> bool:
+    """Load the local model now if EMBED_BACKEND may use it. Returns True if loaded.
+
+    Only loads (no inference), so it is safe before gunicorn forks: workers
+    share the weights instead of each fetching them inside a request.
+    """
+    if EMBED_BACKEND not in ('local', 'auto') or not LOCAL_AVAILABLE:
+        return False
+    try:
+        LocalEmbedder()._get_model()
+        return True
+    except Exception as e:
+        logger.error(f"Could not preload local embedder {LOCAL_EMBED_MODEL}: {e}")
+        return False
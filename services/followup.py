@@ -0,0 +1,158 @@
+"""Background Gemini upgrades of replies sent with the pre-fetched interpretation.
+
+The webhook answers at once with the pre-fetched interpretation. A worker
+then asks Gemini for a contextual one (up to ~30 s across both models) and
+edits the sent message in place, so no gunicorn worker waits on the LLM.
+With streaming on, each section is edited in as soon as Gemini finishes it.
+"""
+
+import os
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from config import (
+    GOOGLE_API_KEY, FOLLOWUP_WORKERS, FOLLOWUP_MAX_PENDING, GEMINI_STREAMING, STREAM_EDIT_INTERVAL,
+)
+from services.ai_interpretation import get_contextual_interpretation
+from services.interpretations import SECTION_MARKER, get_interpretation_sections
+from services.telegram_api import edit_message_text
+from services.metrics import register_runtime_stats
+
+logger = logging.getLogger('gitagpt.followup')
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+_pending = 0
+_stats = {
+    'submitted': 0, 'edited': 0, 'unchanged': 0, 'failed': 0, 'dropped': 0,
+    'partial_edits': 0, 'total_ms': 0.0,
+}
+_stats_lock = threading.Lock()
+
+
+def get_followup_stats() -> dict:
+    """Upgrade job counts for this worker, with average job time (ms)."""
+    with _stats_lock:
+        done = _stats['edited'] + _stats['unchanged'] + _stats['failed']
+        stats = {k: v for k, v in _stats.items() if k != 'total_ms'}
+        stats['pending'] = _pending
+        stats['avg_ms'] = round(_stats['total_ms'] / done, 1) if done else 0.0
+        return stats
+
+
+register_runtime_stats('followups', get_followup_stats)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """This process's pool. Threads don't survive gunicorn's fork, so one per pid."""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=FOLLOWUP_WORKERS, thread_name_prefix='followup')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _merge_partial(sections: list[str], fallback: list[str]) -> str:
+    """Streamed sections so far, with the pre-fetched sections standing in for the rest."""
+    if len(fallback) < 2:
+        # A plain pre-fetched text is the bhavarth alone
+        fallback = ['', fallback[0] if fallback else '', '']
+    fallback = (fallback + ['', '', ''])[:3]
+    sections = sections[:3]
+    return SECTION_MARKER.join(sections + fallback[len(sections):])
+
+
+class _SectionEditor:
+    """on_sections callback that edits the message, at most once per STREAM_EDIT_INTERVAL.
+
+    Sections arriving faster than that are shown by the next edit (or the final one).
+    """
+
+    def __init__(self, chat_id, message_id, render, fallback: list[str]):
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.render = render
+        self.fallback = fallback
+        self.edits = 0
+        self.last_text = None
+        self._last_edit = 0.0
+
+    def __call__(self, sections: list[str]):
+        now = time.monotonic()
+        if now - self._last_edit < STREAM_EDIT_INTERVAL:
+            return
+        self._last_edit = now
+        try:
+            text = self.render(_merge_partial(sections, self.fallback))
+            result = edit_message_text(self.chat_id, self.message_id, text)
+            if result and result.get('ok'):
+                self.edits += 1
+                self.last_text = text
+        except Exception as e:
+            # Never let a failed edit abort the generation itself
+            logger.warning(f"Partial edit failed for {self.chat_id}: {e}")
+
+
+def _upgrade(chat_id, message_id, query: str, shlokas: list[dict], render, prefetched: str):
+    global _pending
+    started = time.perf_counter()
+    outcome = 'failed'
+    editor = None
+    if GEMINI_STREAMING:
+        # prefetched is the store's text for the first shloka: reuse its pre-split sections
+        fallback = get_interpretation_sections(shlokas[0]['shloka_id']) if prefetched else []
+        editor = _SectionEditor(chat_id, message_id, render, fallback)
+    try:
+        interpretation = get_contextual_interpretation(query, shlokas, on_sections=editor)
+        if not interpretation or interpretation == prefetched:
+            if editor and editor.edits:
+                # Partial sections are on screen but the answer was dropped: restore
+                edit_message_text(chat_id, message_id, render(prefetched))
+            outcome = 'unchanged'
+            return
+        text = render(interpretation)
+        if editor and editor.last_text == text:
+            # Streaming already showed the whole answer; Telegram rejects no-op edits
+            outcome = 'edited'
+            return
+        result = edit_message_text(chat_id, message_id, text)
+        if result and result.get('ok'):
+            outcome = 'edited'
+        else:
+            logger.warning(f"Could not upgrade message {message_id} for {chat_id}: {result}")
+    except Exception as e:
+        logger.error(f"Upgrade job error for {chat_id}: {e}", exc_info=True)
+    finally:
+        with _stats_lock:
+            _pending -= 1
+            _stats[outcome] += 1
+            _stats['partial_edits'] += editor.edits if editor else 0
+            _stats['total_ms'] += (time.perf_counter() - started) * 1000
+
+
+def submit_upgrade(chat_id, message_id, query: str, shlokas: list[dict], render, prefetched: str = '') -> bool:
+    """Queue a Gemini rewrite of a sent reply.
+
+    render(interpretation) must return the full message text. Returns False
+    when Gemini is not configured or too many jobs are already waiting; the
+    user keeps the pre-fetched reply in that case.
+    """
+    global _pending
+    if not GOOGLE_API_KEY or not message_id or not shlokas:
+        return False
+    with _stats_lock:
+        if _pending >= FOLLOWUP_MAX_PENDING:
+            _stats['dropped'] += 1
+            return False
+        _pending += 1
+        _stats['submitted'] += 1
+
+    if FOLLOWUP_WORKERS <= 0:
+        _upgrade(chat_id, message_id, query, shlokas, render, prefetched)
+    else:
+        _get_executor().submit(_upgrade, chat_id, message_id, query, shlokas, render, prefetched)
+    return True
@@ -4,6 +4,7 @@ import re
 from datetime import datetime
 from config import TOPIC_MENU, AMRIT_SHLOKAS
 from services.telegram_api import make_inline_keyboard
+from services.interpretations import SECTION_MARKER, split_sections
 
 
 def _strip_verse_ref(text: str) -> str:
@@ -28,25 +29,33 @@ def _trim_commentary(text: str, max_len: int = 300) -> str:
     return trimmed.rstrip() + '…'
 
 
-def _parse_interpretation(interpretation: str) -> tuple[str, str, str]:
-    """Parse Gemini's [SECTION] separated output into (shabdarth, bhavarth, guidance).
+def _parse_interpretation(interpretation: str | list[str]) -> tuple[str, str, str]:
+    """Parse [SECTION] separated text, or its pre-split sections, into (shabdarth, bhavarth, guidance).
     If no [SECTION] found (pre-fetched), treat as bhavarth only."""
     if not interpretation:
         return "", "", ""
 
-    if '[SECTION]' not in interpretation:
+    if isinstance(interpretation, list):
+        parts = interpretation
+    elif SECTION_MARKER in interpretation:
+        parts = split_sections(interpretation)
+    else:
+        parts = [interpretation]
+    if len(parts) == 1:
         # Pre-fetched interpretation — use as bhavarth, skip shabdarth
-        return "", _strip_verse_ref(interpretation), ""
+        return "", _strip_verse_ref(parts[0]), ""
 
-    parts = [p.strip() for p in interpretation.split('[SECTION]')]
     shabdarth = parts[0] if len(parts) > 0 else ""
     bhavarth = parts[1] if len(parts) > 1 else ""
     guidance = parts[2] if len(parts) > 2 else ""
     return shabdarth, bhavarth, guidance
 
 
-def format_shloka(shloka: dict, interpretation: str = "") -> str:
-    """Format a single shloka for Telegram with shabdarth + bhavarth + guidance."""
+def format_shloka(shloka: dict, interpretation: str | list[str] = "", passage: str | None = None) -> str:
+    """Format a single shloka for Telegram with shabdarth + bhavarth + guidance.
+
+    passage, if given, is the commentary passage that matched the question;
+    it is shown instead of the opening of the commentary."""
     shabdarth, bhavarth, guidance = _parse_interpretation(interpretation)
 
     parts = [
@@ -63,7 +72,7 @@ def format_shloka(shloka: dict, interpretation: str = "") -> str:
     else:
         parts.extend(["", _strip_verse_ref(shloka['hindi_meaning'])])
 
-    commentary = _strip_verse_ref(shloka.get('hindi_commentary', ''))
+    commentary = _strip_verse_ref(passage or shloka.get('hindi_commentary', ''))
     if commentary:
         parts.extend(["", f"📜 {_trim_commentary(commentary)}"])
 
@@ -181,7 +190,7 @@ def format_invalid_input() -> str:
     return "🙏 कृपया अपना प्रश्न लिखें।\n\nमदद के लिए /help भेजें।"
 
 
-def format_journey_shloka(shloka: dict, interpretation: str, position: int, total: int = 701, chapter_name: str = "") -> str:
+def format_journey_shloka(shloka: dict, interpretation: str | list[str], position: int, total: int = 701, chapter_name: str = "") -> str:
     """Format a journey shloka with progress line."""
     shabdarth, bhavarth, guidance = _parse_interpretation(interpretation)
 
@@ -245,7 +254,7 @@ def format_amrit_menu() -> tuple[str, dict]:
     return text, keyboard
 
 
-def format_amrit_shloka(shloka: dict, interpretation: str = "") -> str:
+def format_amrit_shloka(shloka: dict, interpretation: str | list[str] = "") -> str:
     """Format an amrit shloka response."""
     shabdarth, bhavarth, guidance = _parse_interpretation(interpretation)
 
@@ -0,0 +1,201 @@
+"""Persistent cache of Gemini contextual interpretations.
+
+Entries are keyed on a hash of (prompt version, shloka_id, normalised
+query), so editing the prompt template retires old answers. Topic buttons
+and common questions repeat exactly; near-duplicate questions can also be
+served when their query embeddings are close enough.
+"""
+
+import math
+import time
+import hashlib
+import sqlite3
+import logging
+import threading
+from array import array
+from collections import OrderedDict
+from services.embed_cache import normalize_query
+
+logger = logging.getLogger('gitagpt.interpretation_cache')
+
+# Newest entries compared per near-duplicate lookup
+_SIMILAR_CANDIDATES = 200
+# Expire/trim the table every this many writes
+_SWEEP_EVERY = 100
+
+
+def cache_key(scope: str, shloka_id: str, query: str) -> str:
+    return hashlib.sha256(f"{scope}\x1f{shloka_id}\x1f{normalize_query(query)}".encode('utf-8')).hexdigest()
+
+
+def _cosine(a: array, b: array) -> float:
+    if len(a) != len(b):
+        # Stored by a different embedding model
+        return 0.0
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class InterpretationCache:
+    """LRU in front of a SQLite table with TTL and size-bounded (least recently used) eviction."""
+
+    def __init__(self, db_path, ttl_seconds: float, max_entries: int, max_memory: int = 512):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_memory = max_memory
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._table_ready = False
+        self._writes = 0
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+
+    def _get_conn(self):
+        conn = sqlite3.connect(self.db_path, timeout=5)
+        if not self._table_ready:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS interpretation_cache (
+                    key TEXT PRIMARY KEY,
+                    scope TEXT NOT NULL,
+                    shloka_id TEXT NOT NULL,
+                    query TEXT NOT NULL,
+                    text TEXT NOT NULL,
+                    embedding BLOB,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS idx_interp_cache_shloka
+                    ON interpretation_cache(scope, shloka_id, created_at);
+                CREATE INDEX IF NOT EXISTS idx_interp_cache_used
+                    ON interpretation_cache(last_used);
+            ''')
+            conn.commit()
+            self._table_ready = True
+        return conn
+
+    def _remember(self, key: str, text: str, created_at: float):
+        with self._lock:
+            self._lru[key] = (text, created_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_memory:
+                self._lru.popitem(last=False)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def get(self, scope: str, shloka_id: str, query: str,
+            query_embedding: list[float] | None = None, min_similarity: float = 0.0) -> str | None:
+        """Cached interpretation, or None on a miss.
+
+        With a query embedding and min_similarity > 0, falls back to the most
+        similar cached question for the same shloka.
+        """
+        key = cache_key(scope, shloka_id, query)
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._lru.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+        similar = False
+        try:
+            conn = self._get_conn()
+            try:
+                row = conn.execute(
+                    'SELECT text, created_at FROM interpretation_cache WHERE key = ? AND created_at > ?',
+                    (key, now - self.ttl_seconds),
+                ).fetchone()
+                if row is not None:
+                    conn.execute('UPDATE interpretation_cache SET last_used = ? WHERE key = ?', (now, key))
+                elif query_embedding is not None and min_similarity > 0:
+                    row = self._nearest(conn, scope, shloka_id, query_embedding, min_similarity, now)
+                    similar = row is not None
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Interpretation cache read error: {e}")
+            row = None
+
+        if row is None:
+            self._count('misses')
+            return None
+        # A near-duplicate's answer also serves exact repeats of this query
+        self._remember(key, *row)
+        self._count('similar_hits' if similar else 'hits')
+        return row[0]
+
+    def _nearest(self, conn, scope: str, shloka_id: str, query_embedding: list[float],
+                 min_similarity: float, now: float):
+        rows = conn.execute(
+            '''SELECT key, text, created_at, embedding FROM interpretation_cache
+               WHERE scope = ? AND shloka_id = ? AND created_at > ? AND embedding IS NOT NULL
+               ORDER BY created_at DESC LIMIT ?''',
+            (scope, shloka_id, now - self.ttl_seconds, _SIMILAR_CANDIDATES),
+        ).fetchall()
+        target = array('f', query_embedding)
+        best, best_similarity = None, min_similarity
+        for key, text, created_at, blob in rows:
+            similarity = _cosine(target, array('f', blob))
+            if similarity >= best_similarity:
+                best, best_similarity = (key, text, created_at), similarity
+        if best is None:
+            return None
+        conn.execute('UPDATE interpretation_cache SET last_used = ? WHERE key = ?', (now, best[0]))
+        return best[1], best[2]
+
+    def put(self, scope: str, shloka_id: str, query: str, text: str,
+            query_embedding: list[float] | None = None):
+        """Store a validated interpretation in both tiers."""
+        key = cache_key(scope, shloka_id, query)
+        now = time.time()
+        self._remember(key, text, now)
+        blob = array('f', query_embedding).tobytes() if query_embedding is not None else None
+        try:
+            conn = self._get_conn()
+            try:
+                conn.execute(
+                    '''INSERT OR REPLACE INTO interpretation_cache
+                       (key, scope, shloka_id, query, text, embedding, created_at, last_used)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                    (key, scope, shloka_id, normalize_query(query), text, blob, now, now),
+                )
+                with self._lock:
+                    self._writes += 1
+                    sweep = self._writes % _SWEEP_EVERY == 0
+                if sweep:
+                    self._sweep(conn, now)
+                conn.commit()
+            finally:
+                conn.close()
+        except sqlite3.Error as e:
+            logger.error(f"Interpretation cache write error: {e}")
+
+    def _sweep(self, conn, now: float):
+        """Drop expired entries, then the least recently used beyond max_entries."""
+        conn.execute('DELETE FROM interpretation_cache WHERE created_at <= ?', (now - self.ttl_seconds,))
+        conn.execute(
+            '''DELETE FROM interpretation_cache WHERE key IN (
+                   SELECT key FROM interpretation_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+               )''',
+            (self.max_entries,),
+        )
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process."""
+        with self._lock:
+            lookups = self.hits + self.similar_hits + self.misses
+            return {
+                'hits': self.hits,
+                'similar_hits': self.similar_hits,
+                'misses': self.misses,
+                'hit_rate': round((lookups - self.misses) / lookups, 3) if lookups else 0.0,
+                'memory_size': len(self._lru),
+            }
@@ -0,0 +1,89 @@
+"""Pre-fetched interpretations, loaded once and shared by every caller.
+
+All texts live in one UTF-8 bytes blob with an offset table, instead of
+701 separate str objects. Loaded at import, so with `gunicorn --preload`
+the blob is read once in the master and shared copy-on-write by the
+workers. Reads touch only the blob's single object header, not one
+refcount per string.
+"""
+
+import json
+import logging
+from config import DATA_DIR
+
+logger = logging.getLogger('gitagpt.interpretations')
+
+SECTION_MARKER = '[SECTION]'
+_MARKER_BYTES = SECTION_MARKER.encode('utf-8')
+
+
+class InterpretationStore:
+    """Read-only shloka_id -> interpretation text, with [SECTION] offsets precomputed."""
+
+    def __init__(self, texts: dict[str, str]):
+        chunks = []
+        self._spans = {}
+        self._sections = {}
+        pos = 0
+        for shloka_id, text in texts.items():
+            data = text.encode('utf-8')
+            chunks.append(data)
+            self._spans[shloka_id] = (pos, pos + len(data))
+            if _MARKER_BYTES in data:
+                sections, start = [], 0
+                while True:
+                    end = data.find(_MARKER_BYTES, start)
+                    if end == -1:
+                        sections.append((pos + start, pos + len(data)))
+                        break
+                    sections.append((pos + start, pos + end))
+                    start = end + len(_MARKER_BYTES)
+                self._sections[shloka_id] = tuple(sections)
+            pos += len(data)
+        self._blob = b''.join(chunks)
+
+    @classmethod
+    def load(cls, path) -> 'InterpretationStore':
+        if not path.exists():
+            logger.warning(f"Interpretations not found at {path}")
+            return cls({})
+        with open(path, 'r', encoding='utf-8') as f:
+            store = cls(json.load(f))
+        logger.info(f"Loaded {len(store)} pre-fetched interpretations ({len(store._blob)} bytes)")
+        return store
+
+    def __len__(self) -> int:
+        return len(self._spans)
+
+    def __contains__(self, shloka_id) -> bool:
+        return shloka_id in self._spans
+
+    def get(self, shloka_id: str, default: str = '') -> str:
+        span = self._spans.get(shloka_id)
+        if span is None:
+            return default
+        return self._blob[span[0]:span[1]].decode('utf-8')
+
+    def get_sections(self, shloka_id: str) -> list[str]:
+        """The [SECTION]-delimited parts, stripped, without re-splitting. One part for plain texts."""
+        spans = self._sections.get(shloka_id)
+        if spans is None:
+            text = self.get(shloka_id)
+            return [text.strip()] if text else []
+        return [self._blob[start:end].decode('utf-8').strip() for start, end in spans]
+
+
+def split_sections(text: str) -> list[str]:
+    """The [SECTION]-delimited parts of any other text (e.g. a Gemini answer), stripped."""
+    return [part.strip() for part in text.split(SECTION_MARKER)]
+
+
+INTERPRETATIONS = InterpretationStore.load(DATA_DIR / 'interpretations.json')
+
+
+def get_interpretation(shloka_id: str) -> str:
+    return INTERPRETATIONS.get(shloka_id, '')
+
+
+def get_interpretation_sections(shloka_id: str) -> list[str]:
+    return INTERPRETATIONS.get_sections(shloka_id)
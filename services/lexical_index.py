@@ -0,0 +1,117 @@
+"""Local BM25 index over the corpus text.
+
+Used alongside the vector index: it needs no network call, so search still
+ranks sensibly when Cohere is down, and its ranking is fused with the
+semantic one when both are available.
+"""
+
+import re
+import math
+import unicodedata
+from functools import lru_cache
+from collections import Counter, defaultdict
+
+# Devanagari letters, vowel signs and virama count as word characters
+# (\w alone splits 'काम' at the matra). Dandas (। ॥) are separators.
+_TOKEN_RE = re.compile(r'[\wऀ-ॣ०-ॿ]+')
+
+# Spelling variants that should match: nukta, chandrabindu vs anusvara, joiners
+_NORMALISE = (('़', ''), ('ँ', 'ं'), ('\u200c', ''), ('\u200d', ''))
+
+STOPWORDS = frozenset((
+    'का', 'के', 'की', 'है', 'हैं', 'था', 'थे', 'थी', 'हो', 'में', 'से', 'को', 'ने', 'पर',
+    'और', 'तथा', 'एवं', 'या', 'भी', 'ही', 'तो', 'कि', 'जो', 'वह', 'यह', 'वे', 'ये', 'इस',
+    'उस', 'इन', 'उन', 'एक', 'न', 'नहीं', 'मैं', 'मुझे', 'मेरा', 'मेरे', 'मेरी', 'क्या',
+    'कैसे', 'क्यों', 'कुछ', 'अपने', 'अपना', 'अपनी', 'जब', 'तब', 'लिए', 'साथ', 'द्वारा',
+    'होता', 'होती', 'होते', 'करता', 'करते', 'करती', 'अर्थात्',
+    'the', 'a', 'an', 'is', 'are', 'am', 'i', 'my', 'me', 'to', 'of', 'and', 'in', 'what', 'how',
+))
+
+# Light inflection stripping (vowel-sign endings only), longest first:
+# 'चिंताओं' and 'चिंता' share a stem
+_SUFFIXES = sorted((
+    'ाएंगे', 'ाएंगी', 'ाऊंगा', 'ाऊंगी', 'ियों', 'ियां', 'ाओं', 'ाएं', 'ुओं', 'ुएं',
+    'ों', 'ें', 'ीं', 'ां', 'ो', 'े', 'ू', 'ु', 'ी', 'ि', 'ा',
+), key=len, reverse=True)
+_MIN_STEM = 2
+
+
+@lru_cache(maxsize=65536)
+def _term(token: str) -> str | None:
+    """Index term for a raw token, or None to drop it. Cached: the vocabulary is small."""
+    if len(token) < 2 or token in STOPWORDS or token.isdigit():
+        return None
+    for suffix in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= _MIN_STEM:
+            return token[:-len(suffix)]
+    return token
+
+
+def tokenize(text: str) -> list[str]:
+    """Normalised, stemmed search terms of a Hindi/English text, stopwords and numbers removed."""
+    text = unicodedata.normalize('NFC', text).lower()
+    for old, new in _NORMALISE:
+        text = text.replace(old, new)
+    return [term for term in map(_term, _TOKEN_RE.findall(text)) if term]
+
+
+class LexicalIndex:
+    """BM25 over weighted fields, with every term's postings pre-scored.
+
+    Build cost is one pass over the corpus; a query only sums the
+    precomputed scores of its terms' postings.
+    """
+
+    # A meaning match counts for more than one in the (long) commentary
+    FIELD_WEIGHTS = {'hindi_meaning': 2.0, 'hindi_commentary': 1.0, 'tags': 2.0}
+
+    def __init__(self, docs, k1: float = 1.2, b: float = 0.75):
+        """docs: iterable of (doc_id, {field: text or list of words}) pairs."""
+        self.ids = []
+        term_freqs = []
+        lengths = []
+        for doc_id, fields in docs:
+            tf = defaultdict(float)
+            for field, weight in self.FIELD_WEIGHTS.items():
+                value = fields.get(field) or ''
+                if not isinstance(value, str):
+                    value = ' '.join(value)
+                for term, count in Counter(tokenize(value)).items():
+                    tf[term] += weight * count
+            self.ids.append(doc_id)
+            term_freqs.append(tf)
+            lengths.append(sum(tf.values()))
+
+        n = len(self.ids)
+        avg_len = (sum(lengths) / n) if n else 0.0
+        df = defaultdict(int)
+        for tf in term_freqs:
+            for term in tf:
+                df[term] += 1
+
+        idf = {term: math.log(1 + (n - count + 0.5) / (count + 0.5)) for term, count in df.items()}
+        self._postings = defaultdict(list)
+        for doc, tf in enumerate(term_freqs):
+            norm = k1 * (1 - b + b * lengths[doc] / avg_len) if avg_len else k1
+            for term, freq in tf.items():
+                self._postings[term].append((doc, idf[term] * freq * (k1 + 1) / (freq + norm)))
+        self._chapters = [doc_id.split('.')[0] for doc_id in self.ids]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._postings)
+
+    def search(self, query: str, k: int, skip_chapters=()) -> list[tuple[str, float]]:
+        """Return up to k (doc_id, score) pairs, best first. Empty when no term matches."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            for doc, score in self._postings.get(term, ()):
+                scores[doc] += score
+        ranked = sorted(
+            (doc for doc in scores if self._chapters[doc] not in skip_chapters),
+            key=lambda doc: (-scores[doc], doc),
+        )
+        return [(self.ids[doc], scores[doc]) for doc in ranked[:k]]
@@ -0,0 +1,65 @@
+"""Multi-keyword substring matcher (Aho-Corasick)."""
+
+from collections import deque
+
+
+class KeywordMatcher:
+    """Find every keyword occurrence in a text with one pass over it.
+
+    Built once from (keyword, label) pairs. Matching is case-insensitive and
+    costs O(len(text) + matches) no matter how many keywords are loaded.
+    Overlapping keywords ('मन' inside 'मनन') are all reported, the same as
+    running `keyword in text` for each one.
+    """
+
+    def __init__(self, pairs):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [()]
+        self.size = 0
+
+        for keyword, label in pairs:
+            keyword = keyword.lower()
+            if not keyword:
+                continue
+            node = 0
+            for ch in keyword:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(())
+                    self._goto[node][ch] = nxt
+                node = nxt
+            if label not in self._out[node]:
+                self._out[node] += (label,)
+            self.size += 1
+
+        # Breadth-first failure links; each node inherits its fallback's labels
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                inherited = self._out[self._fail[nxt]]
+                self._out[nxt] += tuple(l for l in inherited if l not in self._out[nxt])
+
+    def iter_labels(self, text: str):
+        """Yield the label of each keyword occurrence, in text order."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for ch in text.lower():
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if out[node]:
+                yield from out[node]
+
+    def labels(self, text: str) -> set:
+        """Set of labels whose keywords occur anywhere in text."""
+        return set(self.iter_labels(text))
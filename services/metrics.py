@@ -7,6 +7,25 @@ from config import DB_PATH
 
 logger = logging.getLogger('gitagpt.metrics')
 
+# In-process counters (cache hits, latencies, ...) registered by services
+_RUNTIME_STATS = {}
+
+
+def register_runtime_stats(name: str, provider):
+    """Register a zero-arg callable returning a dict of live counters."""
+    _RUNTIME_STATS[name] = provider
+
+
+def get_runtime_stats() -> dict:
+    """Snapshot all registered in-process counters for this worker."""
+    stats = {}
+    for name, provider in _RUNTIME_STATS.items():
+        try:
+            stats[name] = provider()
+        except Exception as e:
+            logger.error(f"Runtime stats error ({name}): {e}")
+    return stats
+
 
 def log_event(event_type: str, user_id: str = None, data: str = None):
     """Append an event to the events table."""
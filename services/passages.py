@@ -0,0 +1,61 @@
+"""Split commentary into overlapping passages for multi-vector retrieval.
+
+Each passage is embedded on its own (id '<shloka_id>#<n>'), so the long
+hindi_commentary becomes searchable. The split is deterministic: the app
+rebuilds a passage's text from the corpus instead of storing it twice.
+"""
+
+import re
+
+PASSAGE_CHARS = 600
+PASSAGE_OVERLAP = 150
+
+# Sentence ends: danda, double danda, ?, !, full stop, or a line break
+_SENTENCE_END = re.compile(r'(?<=[।॥?!.])\s+|\n+')
+
+
+def _sentences(text: str, max_chars: int, overlap: int) -> list[str]:
+    """Sentences of text; any longer than max_chars are cut into overlapping windows."""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text):
+        sentence = sentence.strip()
+        while len(sentence) > max_chars:
+            pieces.append(sentence[:max_chars])
+            sentence = sentence[max_chars - overlap:]
+        if sentence:
+            pieces.append(sentence)
+    return pieces
+
+
+def split_passages(text: str, max_chars: int = PASSAGE_CHARS, overlap: int = PASSAGE_OVERLAP) -> list[str]:
+    """Passages of up to max_chars made of whole sentences, each repeating
+    up to `overlap` characters of trailing sentences from the one before."""
+    passages = []
+    current, length = [], 0
+    for sentence in _sentences(text or '', max_chars, overlap):
+        if current and length + len(sentence) > max_chars:
+            passages.append(' '.join(current))
+            carry, carried = [], 0
+            for previous in reversed(current):
+                if carried + len(previous) > overlap:
+                    break
+                carry.insert(0, previous)
+                carried += len(previous) + 1
+            if carried + len(sentence) > max_chars:
+                carry, carried = [], 0
+            current, length = carry, carried
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current:
+        passages.append(' '.join(current))
+    return passages
+
+
+def passage_id(shloka_id: str, n: int) -> str:
+    return f"{shloka_id}#{n}"
+
+
+def passage_text(shloka: dict, n: int) -> str | None:
+    """Text of passage n of a shloka's commentary, or None if it no longer exists."""
+    passages = split_passages(shloka.get('hindi_commentary', ''))
+    return passages[n] if 0 <= n < len(passages) else None
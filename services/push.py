@@ -0,0 +1,79 @@
+"""Bounded-concurrency fan-out of Telegram messages for the daily push."""
+
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config import PUSH_WORKERS, PUSH_RATE, PUSH_MAX_ATTEMPTS
+from services.telegram_api import send_message
+from services.throttle import TokenBucket
+
+logger = logging.getLogger('gitagpt.push')
+
+# Telegram allows about one message per second to the same chat
+_PER_CHAT_INTERVAL = 1.0
+# Errors that retrying will not fix (bad request, bot blocked by the user)
+_PERMANENT_ERRORS = {400, 403}
+
+
+def _deliver(chat_id, text, reply_markup, bucket: TokenBucket, max_attempts: int) -> tuple[bool, int]:
+    """Send one message, honouring 429 retry_after. Returns (delivered, retries)."""
+    retries = 0
+    for attempt in range(max_attempts):
+        bucket.acquire()
+        result = send_message(chat_id, text, reply_markup) or {}
+        if result.get('ok'):
+            return True, retries
+        if result.get('error_code') in _PERMANENT_ERRORS or attempt + 1 == max_attempts:
+            break
+
+        retry_after = result.get('parameters', {}).get('retry_after') or 0
+        if retry_after:
+            # Flood control applies to the whole bot: hold every worker
+            bucket.pause(retry_after)
+        # Same chat again, so never sooner than the per-chat interval
+        time.sleep(max(retry_after, _PER_CHAT_INTERVAL * 2 ** attempt))
+        retries += 1
+    return False, retries
+
+
+def fan_out(messages: list[tuple], on_delivered=None, workers: int = PUSH_WORKERS,
+            rate: float = PUSH_RATE, max_attempts: int = PUSH_MAX_ATTEMPTS) -> dict:
+    """Send (chat_id, text, reply_markup) messages with bounded concurrency.
+
+    Sends are paced by a shared token bucket (`rate` messages/sec overall).
+    on_delivered(chat_id) runs on the calling thread for each success, so it
+    may touch SQLite without extra locking.
+    """
+    bucket = TokenBucket(rate)
+    started = time.monotonic()
+    sent, failed, retried = 0, 0, 0
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='push') as pool:
+        futures = {
+            pool.submit(_deliver, chat_id, text, markup, bucket, max_attempts): chat_id
+            for chat_id, text, markup in messages
+        }
+        for future in as_completed(futures):
+            chat_id = futures[future]
+            try:
+                delivered, retries = future.result()
+            except Exception as e:
+                logger.error(f"Failed to send to {chat_id}: {e}")
+                delivered, retries = False, 0
+
+            retried += retries
+            if delivered:
+                sent += 1
+                if on_delivered:
+                    on_delivered(chat_id)
+            else:
+                failed += 1
+
+    elapsed = time.monotonic() - started
+    return {
+        'sent': sent,
+        'failed': failed,
+        'retried': retried,
+        'elapsed_s': round(elapsed, 2),
+        'per_sec': round(sent / elapsed, 1) if elapsed else 0.0,
+    }
@@ -1,29 +1,49 @@
 """Semantic + keyword search for shlokas."""
 
-import os
+import time
 import logging
-from models.shloka import SHLOKAS, SHLOKA_LOOKUP, COMPLETE_LOOKUP, CURATED_TOPICS, TOPIC_INDEX
-from config import DATA_DIR
-from services.metrics import log_event
+import threading
+from models.shloka import SHLOKAS, SHLOKA_LOOKUP, COMPLETE_SHLOKAS, COMPLETE_LOOKUP, CURATED_TOPICS, TOPIC_INDEX
+from models.corpus import shloka_fields
+from config import DATA_DIR, CACHE_DB_PATH, EMBED_CACHE_SIZE, EMBED_CACHE_MAX_ENTRIES, VECTOR_STORE_DIR
+from services.embed_cache import EmbeddingCache
+from services.embedders import COHERE_EMBED_MODEL, get_embedders
+from services.matcher import KeywordMatcher
+from services.lexical_index import LexicalIndex
+from services.passages import passage_text
+from services.metrics import log_event, register_runtime_stats
 
 logger = logging.getLogger('gitagpt.search')
 
 # Lazy imports for optional dependencies
 try:
-    import cohere
-    import chromadb
+    from services.vector_index import VectorIndex, QuantizedIndex
     SEMANTIC_AVAILABLE = True
 except ImportError:
     SEMANTIC_AVAILABLE = False
-    logger.warning("chromadb/cohere not installed. Keyword matching only.")
+    logger.warning("numpy not installed. Keyword matching only.")
+
+EMBED_MODEL = COHERE_EMBED_MODEL
+
+_embedding_cache = EmbeddingCache(CACHE_DB_PATH, max_memory=EMBED_CACHE_SIZE, max_entries=EMBED_CACHE_MAX_ENTRIES)
+register_runtime_stats('embed_cache', _embedding_cache.stats)
 
 
 class SemanticSearch:
-    """Semantic search using Cohere embeddings and ChromaDB."""
+    """Semantic search using pluggable embedders and in-memory vector indexes.
+
+    Each embedder (Cohere, or a local CPU model) is paired with the index
+    built by the same model, and they are tried in order: with EMBED_BACKEND
+    'auto', a Cohere failure (missing key, quota, network) falls through to
+    the local model. Each may also have a commentary passage index, whose
+    hits count for their verse (best passage wins) and are fused with the
+    verse hits. Vectors come from the compact quantised store when one
+    has been exported (memory-mapped, shared by workers), otherwise from
+    ChromaDB, read once at init; queries never touch either.
+    """
 
     def __init__(self):
-        self.co = None
-        self.collection = None
+        self.backends = []
         self._initialized = False
 
     def _init_lazy(self):
@@ -33,79 +53,196 @@ class SemanticSearch:
         if not SEMANTIC_AVAILABLE:
             return False
 
-        api_key = os.environ.get('COHERE_API_KEY')
-        if not api_key:
-            logger.warning("COHERE_API_KEY not set.")
-            return False
-
-        chromadb_path = DATA_DIR / 'chromadb_full'
-        if not chromadb_path.exists():
-            logger.warning(f"ChromaDB not found at {chromadb_path}")
-            return False
-
-        try:
-            self.co = cohere.Client(api_key)
-            client = chromadb.PersistentClient(path=str(chromadb_path))
-            self.collection = client.get_collection("gita_full")
-            self._initialized = True
-            logger.info(f"Semantic search ready: {self.collection.count()} embeddings")
-            return True
-        except Exception as e:
-            logger.error(f"Semantic search init error: {e}")
+        backends = []
+        for embedder in get_embedders():
+            try:
+                index = _load_index(embedder.collection)
+            except Exception as e:
+                logger.error(f"Semantic search init error ({embedder.name}): {e}")
+                continue
+            if index is None:
+                logger.warning(f"No vectors for {embedder.name} ({embedder.collection})")
+                continue
+            try:
+                passages = _load_index(f"{embedder.collection}_passages")
+            except Exception as e:
+                logger.warning(f"Passage index unavailable ({embedder.name}): {e}")
+                passages = None
+            backends.append((embedder, index, passages))
+            logger.info(
+                f"Semantic search ready: {embedder.name}, {len(index)} embeddings"
+                + (f" + {len(passages)} passages" if passages is not None else "")
+            )
+        if not backends:
             return False
+        self.backends = backends
+        self._initialized = True
+        return True
 
     # Chapter 1 is narrative (battlefield description), not spiritual advice
     SKIP_CHAPTERS = {'1'}
-    # Distance threshold — above this, results are too weak to trust
-    MAX_DISTANCE = 0.50
+    # Distance thresholds are per embedder (embedder.max_distance)
+
+    @property
+    def model_name(self) -> str:
+        """Name of the preferred embedder (its vectors are the ones worth caching)."""
+        return self.backends[0][0].name if self.backends else EMBED_MODEL
+
+    def _embed_query(self, query: str, embedder) -> list[float]:
+        """Embed a query, reusing cached vectors for repeated questions."""
+        embedding = _embedding_cache.get(query, embedder.name)
+        if embedding is not None:
+            return embedding
+
+        embedding = embedder.embed([query], input_type='search_query')[0]
+        _embedding_cache.put(query, embedder.name, embedding)
+        return embedding
 
     def search(self, query: str, n_results: int = 3) -> list[str]:
         if not self._init_lazy():
             return []
 
-        try:
-            response = self.co.embed(
-                texts=[query],
-                model="embed-multilingual-v3.0",
-                input_type="search_query",
-                truncate="END",
-            )
-            query_embedding = response.embeddings[0]
+        for embedder, index, passages in self.backends:
+            try:
+                query_embedding = self._embed_query(query, embedder)
+                hits = index.search(
+                    query_embedding,
+                    k=n_results,
+                    max_distance=embedder.max_distance,
+                    skip_chapters=self.SKIP_CHAPTERS,
+                )
+                passage_hits = passages.search_grouped(
+                    query_embedding,
+                    k=n_results,
+                    max_distance=embedder.max_distance,
+                    skip_chapters=self.SKIP_CHAPTERS,
+                ) if passages is not None else []
+            except Exception as e:
+                log_event('api_error', data=f'embed_error:{embedder.name}')
+                logger.error(f"Semantic search error ({embedder.name}): {e}")
+                continue
 
-            # Fetch extra results to account for filtering
-            results = self.collection.query(
-                query_embeddings=[query_embedding],
-                n_results=n_results + 10,
-                include=["distances"],
-            )
-
-            if not results or not results['ids']:
-                return []
-
-            filtered = []
-            for sid, dist in zip(results['ids'][0], results['distances'][0]):
-                if dist > self.MAX_DISTANCE:
-                    continue
-                chapter = sid.split('.')[0]
-                if chapter in self.SKIP_CHAPTERS:
-                    continue
-                filtered.append(sid)
-                if len(filtered) >= n_results:
-                    break
+            filtered = [sid for sid, _ in hits]
+            if passage_hits:
+                filtered = fuse_rankings([filtered, [sid for sid, _, _ in passage_hits]], n_results)
 
             if filtered:
-                logger.info(f"[Semantic] {filtered} (best dist: {results['distances'][0][0]:.4f})")
+                best = min([d for _, d in hits] + [d for _, d, _ in passage_hits])
+                logger.info(f"[Semantic:{embedder.name}] {filtered} (best dist: {best:.4f})")
             else:
-                logger.info(f"[Semantic] No good matches (best dist: {results['distances'][0][0]:.4f})")
+                logger.info(f"[Semantic:{embedder.name}] No good matches")
             return filtered
-        except Exception as e:
-            log_event('api_error', data=f'cohere_error')
-            logger.error(f"Semantic search error: {e}")
-            return []
+        return []
+
+    def cached_embedding(self, query: str) -> list[float] | None:
+        """The query's vector from whichever embedder served it, peeked in fallback order."""
+        for embedder, _, _ in self.backends:
+            query_embedding = _embedding_cache.peek(query, embedder.name)
+            if query_embedding is not None:
+                return query_embedding
+        return None
+
+    def best_passage(self, query: str, shloka_id: str) -> str | None:
+        """The shloka's commentary passage closest to an already-embedded query.
+
+        Uses the cached query vector only (no embedding call); None when
+        there is no passage index or no passage is close enough.
+        """
+        shloka = COMPLETE_LOOKUP.get(shloka_id)
+        if shloka is None or not self._init_lazy():
+            return None
+        for embedder, _, passages in self.backends:
+            if passages is None:
+                continue
+            query_embedding = _embedding_cache.peek(query, embedder.name)
+            if query_embedding is None:
+                continue
+            hit = passages.best_in_group(query_embedding, shloka_id)
+            if hit is None or hit[1] > embedder.max_distance:
+                return None
+            return passage_text(shloka, int(hit[0].rsplit('#', 1)[1]))
+        return None
+
+
+def _load_index(collection: str):
+    """Vectors of a collection: the exported compact store if present, else ChromaDB, else None.
+
+    The indexer deletes a store as soon as its collection changes, so a
+    store that exists is never older than the collection.
+    """
+    store_path = VECTOR_STORE_DIR / f"{collection}.vec"
+    if store_path.exists():
+        return QuantizedIndex.load(store_path)
+    chromadb_path = DATA_DIR / 'chromadb_full'
+    if not chromadb_path.exists():
+        return None
+    return VectorIndex.from_chromadb(chromadb_path, collection)
 
 
 _semantic_search = SemanticSearch()
 
+
+def cached_query_embedding(query: str) -> list[float] | None:
+    """Embedding of a query semantic search has already seen, without embedding it again.
+
+    After a fallback the vector is cached under the local model's name, so
+    every backend is tried, not just the preferred one.
+    """
+    return _semantic_search.cached_embedding(query)
+
+
+def best_passage(query: str, shloka_id: str) -> str | None:
+    """Commentary passage of shloka_id that best answers query, for display."""
+    try:
+        return _semantic_search.best_passage(query, shloka_id)
+    except Exception as e:
+        logger.error(f"Best passage error for {shloka_id}: {e}")
+        return None
+
+
+_lexical_index = None
+_lexical_lock = threading.Lock()
+
+
+def get_lexical_index() -> LexicalIndex:
+    """BM25 index over all 701 shlokas, built on first use (app.py warms it before fork).
+
+    Only the indexed fields are read from the corpus artefact; the records
+    themselves stay lazily decoded.
+    """
+    global _lexical_index
+    if _lexical_index is None:
+        with _lexical_lock:
+            if _lexical_index is None:
+                started = time.perf_counter()
+                index = LexicalIndex(shloka_fields(COMPLETE_SHLOKAS, LexicalIndex.FIELD_WEIGHTS))
+                logger.info(
+                    f"Lexical index ready: {len(index)} shlokas, {index.vocabulary_size} terms "
+                    f"in {(time.perf_counter() - started) * 1000:.0f}ms"
+                )
+                _lexical_index = index
+    return _lexical_index
+
+
+def lexical_search(query: str, n_results: int) -> list[str]:
+    """BM25-ranked shloka IDs; no network, empty when no query term is in the corpus."""
+    hits = get_lexical_index().search(query, k=n_results, skip_chapters=SemanticSearch.SKIP_CHAPTERS)
+    return [sid for sid, _ in hits]
+
+
+# Reciprocal-rank fusion constant: damps the gap between rank 1 and rank 2
+RRF_K = 60
+
+
+def fuse_rankings(rankings: list[list[str]], limit: int) -> list[str]:
+    """Merge ranked ID lists by reciprocal rank; ties keep the earlier list's order."""
+    scores = {}
+    for ranking in rankings:
+        for rank, sid in enumerate(ranking):
+            scores[sid] = scores.get(sid, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(scores, key=lambda sid: -scores[sid])[:limit]
+
+
 # Topic keywords for keyword fallback
 USER_QUERY_TOPICS = {
     'karma': ['काम', 'कर्म', 'करना', 'कर्तव्य', 'जिम्मेदारी', 'duty', 'work', 'action'],
@@ -128,51 +265,65 @@ USER_QUERY_TOPICS = {
 }
 
 
+# Keyword automata built once at import; each lookup is one pass over the query
+_TOPIC_MATCHER = KeywordMatcher(
+    (kw, topic) for topic, keywords in USER_QUERY_TOPICS.items() for kw in keywords
+)
+_CURATED_MATCHER = KeywordMatcher(
+    (kw, topic_id) for topic_id, info in CURATED_TOPICS.items() for kw in info.get('keywords', [])
+)
+
+
 def detect_topics(query: str) -> list[str]:
-    query_lower = query.lower()
-    detected = []
-    for topic, keywords in USER_QUERY_TOPICS.items():
-        for kw in keywords:
-            if kw.lower() in query_lower:
-                detected.append(topic)
-                break
-    return detected
+    found = _TOPIC_MATCHER.labels(query)
+    return [topic for topic in USER_QUERY_TOPICS if topic in found]
 
 
-def find_relevant_shlokas(query: str, max_results: int = 3) -> list[dict]:
-    """Find relevant shlokas: semantic search -> curated topics -> keyword fallback."""
+# How many ranked candidates to keep per question for 'और' paging
+RANKED_POOL_SIZE = 10
+
+
+def get_shlokas(shloka_ids: list[str]) -> list[dict]:
+    """Resolve shloka IDs to records, dropping unknown IDs."""
+    results = [COMPLETE_LOOKUP.get(sid) for sid in shloka_ids]
+    return [r for r in results if r]
+
+
+def rank_shlokas(query: str, limit: int = RANKED_POOL_SIZE) -> list[str]:
+    """Ranked shloka IDs: semantic + BM25 (fused) -> curated topics + BM25 -> keyword fallback.
+
+    The list can be stored and paged through without searching again.
+    """
+    lexical_ids = lexical_search(query, n_results=limit)
+
     # Try semantic search first (searches all 701 shlokas)
-    shloka_ids = _semantic_search.search(query, n_results=max_results)
+    shloka_ids = _semantic_search.search(query, n_results=limit)
+    shloka_ids = [s['shloka_id'] for s in get_shlokas(shloka_ids)]
     if shloka_ids:
-        # Look up in COMPLETE_LOOKUP (701) first, fall back to SHLOKA_LOOKUP (100 curated)
-        results = [COMPLETE_LOOKUP.get(sid) or SHLOKA_LOOKUP.get(sid)
-                   for sid in shloka_ids]
-        results = [r for r in results if r]
-        if results:
-            logger.info(f"[Semantic] {[s['shloka_id'] for s in results]}")
-            return results
+        return fuse_rankings([shloka_ids, lexical_ids], limit)
 
     # Fallback: curated topics keyword match
-    query_lower = query.lower()
+    curated_hits = _CURATED_MATCHER.labels(query)
     matched = []
     for topic_id, topic_info in CURATED_TOPICS.items():
-        for keyword in topic_info.get('keywords', []):
-            if keyword.lower() in query_lower:
-                for sid in topic_info.get('best_shlokas', []):
-                    if sid in SHLOKA_LOOKUP and sid not in [s['shloka_id'] for s in matched]:
-                        matched.append(SHLOKA_LOOKUP[sid])
-                        if len(matched) >= max_results:
-                            return matched
-                break
-
-    if matched:
-        return matched[:max_results]
+        if topic_id not in curated_hits:
+            continue
+        for sid in topic_info.get('best_shlokas', []):
+            if sid in SHLOKA_LOOKUP and sid not in matched:
+                matched.append(sid)
+                if len(matched) >= limit:
+                    break
+        if len(matched) >= limit:
+            break
+
+    if matched or lexical_ids:
+        return fuse_rankings([matched, lexical_ids], limit)
 
     # Fallback: topic index
     topics = detect_topics(query)
     if not topics:
         universal_ids = ['2.47', '2.14', '6.5', '18.66', '2.22']
-        return [SHLOKA_LOOKUP[sid] for sid in universal_ids if sid in SHLOKA_LOOKUP][:max_results]
+        return [sid for sid in universal_ids if sid in SHLOKA_LOOKUP][:limit]
 
     shloka_scores = {}
     for topic in topics:
@@ -181,5 +332,12 @@ def find_relevant_shlokas(query: str, max_results: int = 3) -> list[dict]:
                 shloka_scores[sid] = shloka_scores.get(sid, 0) + 1
 
     sorted_shlokas = sorted(shloka_scores.items(), key=lambda x: -x[1])
-    result_ids = [sid for sid, _ in sorted_shlokas[:max_results]]
-    return [SHLOKA_LOOKUP[sid] for sid in result_ids if sid in SHLOKA_LOOKUP]
+    return [sid for sid, _ in sorted_shlokas if sid in SHLOKA_LOOKUP][:limit]
+
+
+def find_relevant_shlokas(query: str, max_results: int = 3) -> list[dict]:
+    """Find the top max_results shlokas for a query."""
+    results = get_shlokas(rank_shlokas(query, limit=max_results))
+    if results:
+        logger.info(f"[Search] {[s['shloka_id'] for s in results]}")
+    return results
@@ -27,6 +27,7 @@ def get_session(user_id: str) -> dict:
                 'last_query': row['last_query'] or '',
                 'context': row['context'],
                 'top_topics': json.loads(row['top_topics'] or '{}'),
+                'ranked_ids': json.loads(row['ranked_ids'] or '[]'),
             }
         # Create new session
         conn.execute(
@@ -40,30 +41,38 @@ def get_session(user_id: str) -> dict:
             'last_query': '',
             'context': None,
             'top_topics': {},
+            'ranked_ids': [],
         }
     finally:
         conn.close()
 
 
-def save_session(user_id: str, query: str, shlokas: list[dict], context: str = None):
-    """Save query results to session."""
+def save_session(user_id: str, query: str, shlokas: list[dict], context: str = None,
+                 ranked_ids: list[str] | None = None):
+    """Save query results to session.
+
+    ranked_ids is the full ranked candidate list for the query, kept so
+    'और' can page through it without searching again.
+    """
     shloka_data = json.dumps([{
         'shloka_id': s['shloka_id'],
         'sanskrit': s['sanskrit'],
         'hindi_meaning': s['hindi_meaning'],
     } for s in shlokas], ensure_ascii=False)
+    ranked_data = json.dumps(ranked_ids or [])
 
     conn = _get_conn()
     try:
         conn.execute(
-            '''INSERT INTO sessions (user_id, last_shlokas, last_query, context, updated_at)
-               VALUES (?, ?, ?, ?, ?)
+            '''INSERT INTO sessions (user_id, last_shlokas, last_query, context, ranked_ids, updated_at)
+               VALUES (?, ?, ?, ?, ?, ?)
                ON CONFLICT(user_id) DO UPDATE SET
                last_shlokas = excluded.last_shlokas,
                last_query = excluded.last_query,
                context = excluded.context,
+               ranked_ids = excluded.ranked_ids,
                updated_at = excluded.updated_at''',
-            (user_id, shloka_data, query, context, datetime.now()),
+            (user_id, shloka_data, query, context, ranked_data, datetime.now()),
         )
         conn.commit()
     finally:
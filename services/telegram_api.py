@@ -1,17 +1,104 @@
 """Lightweight Telegram Bot API wrapper using requests."""
 
 import json
+import time
 import logging
+import threading
 import requests
-from config import TELEGRAM_BOT_TOKEN
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import TELEGRAM_BOT_TOKEN, TELEGRAM_POOL_SIZE, TELEGRAM_RETRIES
+from services.metrics import register_runtime_stats
 
 logger = logging.getLogger('gitagpt.telegram_api')
 
 BASE_URL = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}" if TELEGRAM_BOT_TOKEN else ""
 
 
+def _make_session() -> requests.Session:
+    """Keep-alive session with a bounded connection pool and retry/backoff.
+
+    Connection failures are retried for every call (nothing was sent yet).
+    5xx answers are retried for GET only: a gateway 502/504 may follow a
+    sendMessage Telegram already accepted, and resending it would duplicate
+    the message. 429s are returned to the caller, which knows whether
+    waiting is worthwhile.
+    """
+    retry = Retry(
+        total=TELEGRAM_RETRIES,
+        connect=TELEGRAM_RETRIES,
+        read=0,
+        status=TELEGRAM_RETRIES,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset({'GET'}),
+        backoff_factor=0.3,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=2, pool_maxsize=TELEGRAM_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    return session
+
+
+_session = _make_session()
+
+# Per-endpoint call latency for this worker
+_latency = {}
+_latency_lock = threading.Lock()
+
+
+def _record(endpoint: str, started: float, ok: bool):
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    with _latency_lock:
+        stats = _latency.setdefault(endpoint, {'calls': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['calls'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        if not ok:
+            stats['errors'] += 1
+
+
+def get_api_stats() -> dict:
+    """Calls, errors and latency (ms) per Telegram endpoint."""
+    with _latency_lock:
+        return {
+            endpoint: {
+                'calls': s['calls'],
+                'errors': s['errors'],
+                'avg_ms': round(s['total_ms'] / s['calls'], 1) if s['calls'] else 0.0,
+                'max_ms': round(s['max_ms'], 1),
+            }
+            for endpoint, s in _latency.items()
+        }
+
+
+register_runtime_stats('telegram_api', get_api_stats)
+
+
+def _timed(endpoint: str, send, url: str, **kwargs):
+    """Issue one pooled-session call (send=_session.post/get), recording its latency."""
+    started = time.perf_counter()
+    ok = False
+    try:
+        resp = send(url, **kwargs)
+        ok = resp.status_code < 400
+        return resp
+    finally:
+        _record(endpoint, started, ok)
+
+
+def _post(method: str, payload: dict, timeout: float):
+    """POST a Bot API method through the pooled session."""
+    return _timed(method, _session.post, f"{BASE_URL}/{method}", json=payload, timeout=timeout)
+
+
 def send_message(chat_id, text, reply_markup=None):
-    """Send a text message to a chat."""
+    """Send a text message to a chat.
+
+    Returns Telegram's response body. For API errors this is the error
+    object ({'ok': False, 'error_code': 429, 'parameters': {'retry_after': 3}}),
+    so callers can tell rate limits from permanent failures. None on network errors.
+    """
     payload = {
         'chat_id': chat_id,
         'text': text,
@@ -20,22 +107,46 @@ def send_message(chat_id, text, reply_markup=None):
         payload['reply_markup'] = json.dumps(reply_markup)
 
     try:
-        resp = requests.post(f"{BASE_URL}/sendMessage", json=payload, timeout=10)
-        resp.raise_for_status()
+        resp = _post('sendMessage', payload, timeout=10)
+        if resp.status_code >= 400:
+            logger.error(f"sendMessage error: HTTP {resp.status_code}")
+            try:
+                return resp.json()
+            except ValueError:
+                return None
         return resp.json()
     except Exception as e:
         logger.error(f"sendMessage error: {e}")
         return None
 
 
+def edit_message_text(chat_id, message_id, text, reply_markup=None):
+    """Replace the text of a message the bot sent earlier.
+
+    Returns Telegram's response body like send_message, None on network errors.
+    """
+    payload = {
+        'chat_id': chat_id,
+        'message_id': message_id,
+        'text': text,
+    }
+    if reply_markup:
+        payload['reply_markup'] = json.dumps(reply_markup)
+
+    try:
+        resp = _post('editMessageText', payload, timeout=10)
+        if resp.status_code >= 400:
+            logger.error(f"editMessageText error: HTTP {resp.status_code}")
+        return resp.json()
+    except Exception as e:
+        logger.error(f"editMessageText error: {e}")
+        return None
+
+
 def send_chat_action(chat_id, action='typing'):
     """Send chat action (e.g. typing indicator) to a chat."""
     try:
-        requests.post(
-            f"{BASE_URL}/sendChatAction",
-            json={'chat_id': chat_id, 'action': action},
-            timeout=5,
-        )
+        _post('sendChatAction', {'chat_id': chat_id, 'action': action}, timeout=5)
     except Exception as e:
         logger.error(f"sendChatAction error: {e}")
 
@@ -46,7 +157,7 @@ def answer_callback_query(callback_query_id, text=None):
     if text:
         payload['text'] = text
     try:
-        requests.post(f"{BASE_URL}/answerCallbackQuery", json=payload, timeout=5)
+        _post('answerCallbackQuery', payload, timeout=5)
     except Exception as e:
         logger.error(f"answerCallbackQuery error: {e}")
 
@@ -54,7 +165,7 @@ def answer_callback_query(callback_query_id, text=None):
 def get_file(file_id) -> dict | None:
     """Get file info for downloading."""
     try:
-        resp = requests.post(f"{BASE_URL}/getFile", json={'file_id': file_id}, timeout=10)
+        resp = _post('getFile', {'file_id': file_id}, timeout=10)
         resp.raise_for_status()
         data = resp.json()
         if data.get('ok'):
@@ -68,7 +179,7 @@ def download_file(file_path) -> bytes | None:
     """Download a file from Telegram servers."""
     try:
         url = f"https://api.telegram.org/file/bot{TELEGRAM_BOT_TOKEN}/{file_path}"
-        resp = requests.get(url, timeout=30)
+        resp = _timed('downloadFile', _session.get, url, timeout=30)
         resp.raise_for_status()
         return resp.content
     except Exception as e:
@@ -79,7 +190,7 @@ def download_file(file_path) -> bytes | None:
 def set_webhook(url):
     """Set webhook URL for the bot."""
     try:
-        resp = requests.post(f"{BASE_URL}/setWebhook", json={'url': url}, timeout=10)
+        resp = _post('setWebhook', {'url': url}, timeout=10)
         return resp.json()
     except Exception as e:
         logger.error(f"setWebhook error: {e}")
@@ -0,0 +1,44 @@
+"""Thread-safe token bucket for pacing outbound API calls."""
+
+import time
+import threading
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second, with bursts up to `capacity`.
+
+    pause() blocks every caller for a while, e.g. after a 429 whose
+    retry_after applies to the whole bot rather than one request.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: float = 1.0):
+        """Block until `tokens` are available, then take them."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                else:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                    self._updated = now
+                    if self._tokens >= tokens:
+                        self._tokens -= tokens
+                        return
+                    wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Hold all acquirers for at least `seconds` from now."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            # Refill starts when the pause ends, so there is no burst afterwards
+            self._tokens = 0.0
+            self._updated = self._paused_until
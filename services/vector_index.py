@@ -0,0 +1,303 @@
+"""In-memory cosine index over the corpus embeddings.
+
+ChromaDB stays the build-time store; at runtime all vectors are loaded once
+into a normalised float32 matrix and scored with a single mat-vec product.
+QuantizedIndex instead scores an int8/float16 matrix memory-mapped from a
+compact file exported at build time, so workers share its pages.
+"""
+
+import os
+import json
+import logging
+
+import numpy as np
+
+logger = logging.getLogger('gitagpt.vector_index')
+
+
+class VectorIndex:
+    """Brute-force cosine top-k over a contiguous float32 matrix."""
+
+    def __init__(self, ids: list[str], vectors):
+        matrix = np.ascontiguousarray(vectors, dtype=np.float32)
+        if matrix.ndim != 2 or matrix.shape[0] != len(ids):
+            raise ValueError(f"Expected {len(ids)} vectors, got shape {matrix.shape}")
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        matrix /= norms
+
+        self.ids = list(ids)
+        self.matrix = matrix
+        self._chapters = np.array([sid.split('.')[0] for sid in self.ids])
+        self._chapter_masks = {}
+        self._groups = None
+
+    @classmethod
+    def from_chromadb(cls, path, collection_name: str = 'gita_full') -> 'VectorIndex':
+        """Load every embedding from a ChromaDB collection in one read."""
+        import chromadb
+        client = chromadb.PersistentClient(path=str(path))
+        collection = client.get_collection(collection_name)
+        data = collection.get(include=['embeddings'])
+        return cls(data['ids'], data['embeddings'])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.matrix.shape[1]
+
+    def _keep_mask(self, skip_chapters: frozenset) -> np.ndarray:
+        """Boolean mask of rows outside skip_chapters (cached per chapter set)."""
+        mask = self._chapter_masks.get(skip_chapters)
+        if mask is None:
+            mask = ~np.isin(self._chapters, list(skip_chapters))
+            self._chapter_masks[skip_chapters] = mask
+        return mask
+
+    def distances(self, query_embedding) -> np.ndarray:
+        """Cosine distance (1 - similarity) from the query to every row."""
+        q = np.asarray(query_embedding, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm:
+            q = q / norm
+        return 1.0 - self.matrix @ q
+
+    def search(self, query_embedding, k: int, max_distance: float | None = None,
+               skip_chapters=()) -> list[tuple[str, float]]:
+        """Return up to k (shloka_id, distance) pairs, nearest first."""
+        if k <= 0:
+            return []
+        dist = self.distances(query_embedding)
+
+        mask = self._keep_mask(frozenset(skip_chapters))
+        if max_distance is not None:
+            mask = mask & (dist <= max_distance)
+
+        order = _top_k(dist, mask, k)
+        return [(self.ids[i], float(dist[i])) for i in order]
+
+    def _grouping(self) -> tuple[list[str], np.ndarray, dict]:
+        """Group names, each row's group number and each group's rows.
+
+        A row's group is its id up to '#': passages '2.47#0', '2.47#1'
+        belong to verse '2.47'.
+        """
+        if self._groups is None:
+            names, group_of_row = np.unique([i.split('#')[0] for i in self.ids], return_inverse=True)
+            order = np.argsort(group_of_row, kind='stable')
+            starts = np.searchsorted(group_of_row[order], np.arange(len(names) + 1))
+            rows = {str(name): order[starts[g]:starts[g + 1]] for g, name in enumerate(names)}
+            self._groups = ([str(n) for n in names], group_of_row, rows)
+        return self._groups
+
+    def search_grouped(self, query_embedding, k: int, max_distance: float | None = None,
+                       skip_chapters=()) -> list[tuple[str, float, str]]:
+        """Max-sim over groups: up to k (group, distance, best row id), nearest first.
+
+        A group scores as its single nearest row, so one passage that
+        matches well is enough to surface its verse.
+        """
+        if k <= 0:
+            return []
+        names, group_of_row, _ = self._grouping()
+        dist = self.distances(query_embedding)
+        mask = self._keep_mask(frozenset(skip_chapters))
+        if max_distance is not None:
+            mask = mask & (dist <= max_distance)
+        rows = np.flatnonzero(mask)
+        if not rows.size:
+            return []
+
+        # Sort by (group, distance): the first row of each group run is its best
+        rows = rows[np.lexsort((dist[rows], group_of_row[rows]))]
+        groups = group_of_row[rows]
+        first = np.ones(rows.size, dtype=bool)
+        first[1:] = groups[1:] != groups[:-1]
+        best = rows[first]
+        best = best[np.argsort(dist[best], kind='stable')[:k]]
+        return [(names[group_of_row[i]], float(dist[i]), self.ids[i]) for i in best]
+
+    def _row_distances(self, query_embedding, rows: np.ndarray) -> np.ndarray:
+        return 1.0 - self.matrix[rows] @ _normalise_query(query_embedding)
+
+    def best_in_group(self, query_embedding, group: str) -> tuple[str, float] | None:
+        """(row id, distance) of the group's nearest row, scoring only that group."""
+        rows = self._grouping()[2].get(group)
+        if rows is None:
+            return None
+        dist = self._row_distances(query_embedding, rows)
+        i = int(np.argmin(dist))
+        return self.ids[rows[i]], float(dist[i])
+
+
+def _top_k(dist: np.ndarray, mask: np.ndarray, k: int) -> np.ndarray:
+    """Row numbers of the k smallest distances among rows in mask, nearest first."""
+    candidates = np.flatnonzero(mask)
+    if candidates.size > k:
+        top = np.argpartition(dist[candidates], k - 1)[:k]
+        candidates = candidates[top]
+    return candidates[np.argsort(dist[candidates], kind='stable')]
+
+
+def _normalise_query(query_embedding) -> np.ndarray:
+    q = np.asarray(query_embedding, dtype=np.float32)
+    norm = np.linalg.norm(q)
+    return q / norm if norm else q
+
+
+# Compact store file: magic, header length, JSON header, then 64-byte aligned arrays
+_MAGIC = b'GVEC1\n'
+_ALIGN = 64
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 codes and float32 scales (row ~= codes * scale)."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+def export_vectors(path, ids: list[str], vectors, dtype: str = 'int8', keep_float16: bool = False) -> int:
+    """Write normalised vectors to a compact store file (atomically). Returns its size in bytes.
+
+    dtype 'int8' stores per-vector scaled codes (1 byte/dim), 'float16'
+    the vectors themselves (2 bytes/dim). keep_float16 adds a float16 copy
+    to an int8 store so the top candidates can be re-ranked exactly.
+    """
+    if dtype not in ('int8', 'float16'):
+        raise ValueError(f"Unsupported dtype: {dtype}")
+    matrix = VectorIndex(ids, vectors).matrix
+
+    arrays = {}
+    if dtype == 'int8':
+        arrays['codes'], arrays['scales'] = quantize_int8(matrix)
+        if keep_float16:
+            arrays['float16'] = matrix.astype(np.float16)
+    else:
+        arrays['codes'] = matrix.astype(np.float16)
+
+    layout, offset = {}, 0
+    for name, array in arrays.items():
+        layout[name] = {'offset': offset, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({'ids': list(ids), 'dtype': dtype, 'arrays': layout}, ensure_ascii=False).encode('utf-8')
+    data_start = -(-(len(_MAGIC) + 8 + len(header)) // _ALIGN) * _ALIGN
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_MAGIC)
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + layout[name]['offset'])
+            f.write(np.ascontiguousarray(array).tobytes())
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    return data_start + offset
+
+
+class QuantizedIndex(VectorIndex):
+    """Cosine top-k scored directly against an int8 (or float16) matrix.
+
+    Rows are converted to float32 a block at a time, so a query never
+    materialises the full-precision matrix. When the store carries a
+    float16 copy, the best RERANK_FACTOR x k candidates are re-scored exactly.
+    """
+
+    # float32 scratch per conversion step: small enough to stay in L2 cache,
+    # which keeps int8 scoring as fast as a plain float32 mat-vec
+    BLOCK_BYTES = 1 << 20
+    # Candidates re-scored exactly, per result requested
+    RERANK_FACTOR = 4
+    # Bound on int8 scoring error, so max_distance doesn't drop true hits before re-ranking
+    APPROX_SLACK = 0.02
+
+    def __init__(self, ids: list[str], codes: np.ndarray, scales: np.ndarray | None = None,
+                 exact: np.ndarray | None = None):
+        if codes.ndim != 2 or codes.shape[0] != len(ids):
+            raise ValueError(f"Expected {len(ids)} vectors, got shape {codes.shape}")
+        self.ids = list(ids)
+        self.codes = codes
+        self.scales = scales
+        self.exact = exact
+        self._chapters = np.array([sid.split('.')[0] for sid in self.ids])
+        self._chapter_masks = {}
+        self._groups = None
+
+    @classmethod
+    def from_vectors(cls, ids: list[str], vectors, dtype: str = 'int8', keep_float16: bool = False) -> 'QuantizedIndex':
+        """Quantise in memory (same encoding as export_vectors)."""
+        matrix = VectorIndex(ids, vectors).matrix
+        if dtype == 'float16':
+            return cls(ids, matrix.astype(np.float16))
+        codes, scales = quantize_int8(matrix)
+        return cls(ids, codes, scales, matrix.astype(np.float16) if keep_float16 else None)
+
+    @classmethod
+    def load(cls, path) -> 'QuantizedIndex':
+        """Memory-map a store written by export_vectors."""
+        with open(path, 'rb') as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a vector store")
+            header_len = int.from_bytes(f.read(8), 'little')
+            header = json.loads(f.read(header_len))
+        data_start = -(-(len(_MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+
+        arrays = {
+            name: np.memmap(path, dtype=np.dtype(spec['dtype']), mode='r',
+                            offset=data_start + spec['offset'], shape=tuple(spec['shape']))
+            for name, spec in header['arrays'].items()
+        }
+        return cls(header['ids'], arrays['codes'], arrays.get('scales'), arrays.get('float16'))
+
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1]
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.codes, self.scales, self.exact) if a is not None)
+
+    def distances(self, query_embedding) -> np.ndarray:
+        """Approximate cosine distance from the query to every row."""
+        q = _normalise_query(query_embedding)
+        sims = np.empty(len(self.ids), dtype=np.float32)
+        rows = max(1, self.BLOCK_BYTES // (4 * self.dim))
+        for start in range(0, len(self.ids), rows):
+            block = self.codes[start:start + rows]
+            np.matmul(block.astype(np.float32), q, out=sims[start:start + len(block)])
+        if self.scales is not None:
+            sims *= self.scales
+        return 1.0 - sims
+
+    def _row_distances(self, query_embedding, rows: np.ndarray) -> np.ndarray:
+        q = _normalise_query(query_embedding)
+        if self.exact is not None:
+            return 1.0 - self.exact[rows].astype(np.float32) @ q
+        sims = self.codes[rows].astype(np.float32) @ q
+        if self.scales is not None:
+            sims *= self.scales[rows]
+        return 1.0 - sims
+
+    def search(self, query_embedding, k: int, max_distance: float | None = None,
+               skip_chapters=()) -> list[tuple[str, float]]:
+        """Return up to k (shloka_id, distance) pairs, nearest first."""
+        if self.exact is None:
+            return super().search(query_embedding, k, max_distance, skip_chapters)
+        if k <= 0:
+            return []
+        dist = self.distances(query_embedding)
+        mask = self._keep_mask(frozenset(skip_chapters))
+        if max_distance is not None:
+            mask = mask & (dist <= max_distance + self.APPROX_SLACK)
+
+        pool = _top_k(dist, mask, k * self.RERANK_FACTOR)
+        exact = 1.0 - self.exact[pool].astype(np.float32) @ _normalise_query(query_embedding)
+        if max_distance is not None:
+            keep = exact <= max_distance
+            pool, exact = pool[keep], exact[keep]
+        order = np.argsort(exact, kind='stable')[:k]
+        return [(self.ids[pool[i]], float(exact[i])) for i in order]